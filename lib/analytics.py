@@ -0,0 +1,192 @@
+"""
+Analytical query engine
+Optional DuckDB path for the heavier page queries, reading the Parquet snapshots
+when fresh and otherwise the SQLite (or PostgreSQL) warehouse attached read-only.
+Results have the same shapes as lib.read_model.
+
+Only the observation pivots (metrics_frame) run here: no page resamples or rolls
+a series, so there are no window or resampling queries to serve.
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.database import Base, DB_PATH, IS_POSTGRES, WIDE_VIEW_COLUMNS, engine
+from lib.archive import ARCHIVED_TABLES, PARTITION_COLUMN, archive_files, archive_glob
+from lib.dates import EpochMonth, to_epoch_day
+from lib.snapshots import SNAPSHOT_DIR, snapshot_is_fresh
+
+# duckdb is optional - without it pages use the database/pandas
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+# Engine settings (override via .env); 0 threads = one per core
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS", "0"))
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT", "")
+
+# Seconds before a source that could not be opened (e.g. extension download offline) is tried again
+DUCKDB_RETRY_SECONDS = int(os.getenv("DUCKDB_RETRY_SECONDS", "300"))
+
+# Warehouse tables exposed to analytical queries (views are rebuilt in DuckDB, see metrics_frame)
+ANALYTICS_TABLES = ['observations', 'series', 'diesel_prices', 'diesel_price_rollups', 'lanes', 'rates']
+
+# News is not snapshotted, so it is only exposed when the warehouse is attached
+WAREHOUSE_ONLY_TABLES = ['news_articles']
+
+SOURCE_SNAPSHOT = 'snapshot'
+SOURCE_WAREHOUSE = 'warehouse'
+
+# Observation periods are epoch days (see lib.dates)
+PERIOD_DATE = "(DATE '1970-01-01' + CAST(period AS INTEGER))"
+
+_connections = {}
+_failed_opens = {}  # Connection key -> time.monotonic() of its last failed open
+_connections_lock = threading.Lock()
+
+
+def _load_extension(conn, name: str) -> None:
+    """Load a DuckDB extension, installing (downloading) it only if it is not installed yet"""
+    try:
+        conn.execute(f"LOAD {name}")
+    except duckdb.Error:
+        conn.execute(f"INSTALL {name}")
+        conn.execute(f"LOAD {name}")
+
+
+def _open(source: str, archived: tuple = ()):
+    """
+    In-memory DuckDB database with ANALYTICS_TABLES as views over the chosen source,
+    plus a <table>_all view (hot rows UNION archived Parquet) per archived table
+    """
+    conn = duckdb.connect(':memory:')
+    if DUCKDB_THREADS:
+        conn.execute(f"SET threads = {DUCKDB_THREADS}")
+    if DUCKDB_MEMORY_LIMIT:
+        conn.execute(f"SET memory_limit = '{DUCKDB_MEMORY_LIMIT}'")
+
+    if source == SOURCE_SNAPSHOT:
+        for name in ANALYTICS_TABLES:
+            path = os.path.abspath(os.path.join(SNAPSHOT_DIR, f"{name}.parquet"))
+            conn.execute(f"CREATE VIEW {name} AS SELECT * FROM read_parquet('{path}')")
+    else:
+        if IS_POSTGRES:
+            _load_extension(conn, 'postgres')
+            dsn = engine.url.set(drivername='postgresql').render_as_string(hide_password=False)
+            conn.execute(f"ATTACH '{dsn}' AS warehouse (TYPE POSTGRES, READ_ONLY)")
+        else:
+            _load_extension(conn, 'sqlite')
+            conn.execute(f"ATTACH '{os.path.abspath(DB_PATH)}' AS warehouse (TYPE SQLITE, READ_ONLY)")
+        for name in ANALYTICS_TABLES + WAREHOUSE_ONLY_TABLES:
+            conn.execute(f"CREATE VIEW {name} AS SELECT * FROM warehouse.{name}")
+
+    for name in archived:
+        if source == SOURCE_SNAPSHOT and name not in ANALYTICS_TABLES:
+            continue
+        conn.execute(
+            f"CREATE VIEW {name}_all AS SELECT * FROM {name} UNION ALL BY NAME "
+            f"SELECT * EXCLUDE ({PARTITION_COLUMN}) FROM read_parquet('{archive_glob(name)}', "
+            f"hive_partitioning = true, union_by_name = true)"
+        )
+
+    return conn
+
+
+def _snapshots_usable() -> bool:
+    """Fresh Parquet snapshots exist for every analytics table"""
+    return snapshot_is_fresh() and all(
+        os.path.exists(os.path.join(SNAPSHOT_DIR, f"{name}.parquet")) for name in ANALYTICS_TABLES
+    )
+
+
+def _cursor():
+    """
+    Thread-local cursor on the shared DuckDB database for the current best source
+    Returns None if DuckDB is unavailable or the source cannot be opened; a failed
+    source is retried after DUCKDB_RETRY_SECONDS.
+    """
+    if not DUCKDB_AVAILABLE:
+        return None
+
+    source = SOURCE_SNAPSHOT if _snapshots_usable() else SOURCE_WAREHOUSE
+    # Reopen once the first rows of a table are archived, so its _all view appears
+    archived = tuple(name for name in ARCHIVED_TABLES if archive_files(name))
+    key = (source, archived)
+    with _connections_lock:
+        conn = _connections.get(key)
+        if conn is None:
+            # e.g. sqlite/postgres extension not installable offline; don't retry every query
+            failed_at = _failed_opens.get(key)
+            if failed_at is not None and time.monotonic() - failed_at < DUCKDB_RETRY_SECONDS:
+                return None
+            try:
+                conn = _connections[key] = _open(source, archived)
+            except duckdb.Error as e:
+                _failed_opens[key] = time.monotonic()
+                print(f"⚠️  DuckDB could not open {source} source, using the database "
+                      f"(retrying in {DUCKDB_RETRY_SECONDS}s): {e}")
+                return None
+            _failed_opens.pop(key, None)
+        return conn.cursor()
+
+
+def _query(sql: str, params: list = None):
+    """Run a query and return a DataFrame, or None if DuckDB is not usable"""
+    cursor = _cursor()
+    if cursor is None:
+        return None
+    try:
+        return cursor.execute(sql, params or []).df()
+    finally:
+        cursor.close()
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def metrics_frame(view_name: str, columns: dict, start: str = None):
+    """
+    Rows of a wide metrics view (daily_metrics/macro_metrics) pivoted from observations
+    columns: {view column: DataFrame column}; start: first date/month to include (date or ISO string).
+    Same shape as lib.read_model.metrics_frame, or None if DuckDB is not usable.
+    """
+    mapping = WIDE_VIEW_COLUMNS[view_name]
+    table = Base.metadata.tables[view_name]
+    key = table.primary_key.columns.keys()[0]
+    monthly = isinstance(table.c[key].type, EpochMonth)
+
+    params = []
+    select_list = []
+    for column, name in columns.items():
+        if column == key:
+            key_date = f"date_trunc('month', {PERIOD_DATE})" if monthly else PERIOD_DATE
+            expression = f"CAST({key_date} AS TIMESTAMP)"
+        elif column in mapping:
+            picks = []
+            for series_id in mapping[column]:
+                picks.append("max(value) FILTER (WHERE series_id = ?)")
+                params.append(series_id)
+            expression = f"coalesce({', '.join(picks)})"
+        else:
+            expression = "CAST(NULL AS DOUBLE)"
+        select_list.append(f"{expression} AS {_quote(name)}")
+
+    series_ids = [series_id for series_list in mapping.values() for series_id in series_list]
+    params.extend(series_ids)
+    where = f"series_id IN ({', '.join('?' for _ in series_ids)})"
+    if start:
+        where += " AND period >= ?"
+        params.append(to_epoch_day(start))
+
+    return _query(
+        f"SELECT {', '.join(select_list)} FROM observations WHERE {where} GROUP BY period ORDER BY period",
+        params
+    )
+
@@ -0,0 +1,234 @@
+"""
+Cold-data archive
+Moves news older than NEWS_RETENTION_DAYS (with its full text) and rates older than
+RATES_RETENTION_DAYS out of the database into zstd-compressed Parquet files
+partitioned by month, then compacts the hot database. Archived rows stay queryable
+through the DuckDB *_all union views (see lib.analytics) or read_archive().
+"""
+
+from datetime import datetime, timedelta
+import glob
+import os
+import sys
+
+import pandas as pd
+from sqlalchemy import Integer, bindparam, delete, select, text, type_coerce
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.article_bodies import BODY_COLUMNS, body_text
+from lib.database import (
+    ArticleBody, ArticleTag, NewsArticle, Rate, SessionLocal, UPSERT_BATCH_SIZE,
+    NEWS_FTS_TABLE, engine, rebuild_news_fts
+)
+from lib.dates import epoch_days_to_datetime, to_epoch_day
+from lib.read_model import read_frame
+
+# pyarrow is optional - without it nothing is archived
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "data/archive")
+
+# Rows older than this many days move to the archive (0 disables a table)
+NEWS_RETENTION_DAYS = int(os.getenv("NEWS_RETENTION_DAYS", "365"))
+RATES_RETENTION_DAYS = int(os.getenv("RATES_RETENTION_DAYS", "730"))
+
+ARCHIVE_COMPRESSION = 'zstd'
+
+# Hive-style partition column (directories are <table>/month=YYYY-MM/)
+PARTITION_COLUMN = 'month'
+
+# Tables that can have archived rows
+ARCHIVED_TABLES = ['news_articles', 'rates']
+
+
+def archive_files(table_name: str, archive_dir: str = ARCHIVE_DIR) -> list:
+    """Parquet files archived for a table, oldest partition first"""
+    return sorted(glob.glob(os.path.join(archive_dir, table_name, f"{PARTITION_COLUMN}=*", "*.parquet")))
+
+
+def archive_glob(table_name: str, archive_dir: str = ARCHIVE_DIR) -> str:
+    return os.path.join(os.path.abspath(archive_dir), table_name, f"{PARTITION_COLUMN}=*", "*.parquet")
+
+
+def _write_partitions(df: pd.DataFrame, table_name: str, months: pd.Series, run_tag: str) -> list:
+    """Write one Parquet file per month partition; returns the paths written"""
+    paths = []
+    for month, group in df.groupby(months):
+        directory = os.path.join(ARCHIVE_DIR, table_name, f"{PARTITION_COLUMN}={month}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{run_tag}.parquet")
+
+        # Temp file + rename, so a reader never sees a half-written file
+        table = pa.Table.from_pandas(group.reset_index(drop=True), preserve_index=False)
+        pq.write_table(table, f"{path}.tmp", compression=ARCHIVE_COMPRESSION)
+        os.replace(f"{path}.tmp", path)
+        paths.append(path)
+    return paths
+
+
+def _delete_batched(db, table, key_column, keys: list) -> None:
+    """DELETE rows whose key is in keys, in UPSERT_BATCH_SIZE chunks"""
+    stmt = delete(table).where(key_column.in_(bindparam('keys', expanding=True)))
+    for i in range(0, len(keys), UPSERT_BATCH_SIZE):
+        db.execute(stmt, {'keys': keys[i:i + UPSERT_BATCH_SIZE]})
+
+
+def _archive_news(db, cutoff: datetime, run_tag: str) -> tuple:
+    """Archive news published before cutoff (full text included); returns (rows, paths)"""
+    stmt = (
+        select(NewsArticle.__table__, *BODY_COLUMNS)
+        .outerjoin(ArticleBody, ArticleBody.article_id == NewsArticle.id)
+        .where(NewsArticle.published_at < cutoff)
+    )
+    df = read_frame(db, stmt)
+    if df.empty:
+        return 0, []
+
+    df['full_content'] = [
+        body_text(db, body, codec, dictionary_id)
+        for body, codec, dictionary_id in zip(df.pop('body'), df.pop('codec'), df.pop('dictionary_id'))
+    ]
+
+    paths = _write_partitions(df, 'news_articles', df['published_at'].dt.strftime('%Y-%m'), run_tag)
+
+    # On SQLite the article delete triggers already drop the bodies and FTS entries
+    article_ids = df['id'].tolist()
+    _delete_batched(db, ArticleTag.__table__, ArticleTag.article_id, article_ids)
+    _delete_batched(db, NewsArticle.__table__, NewsArticle.id, article_ids)
+    _delete_batched(db, ArticleBody.__table__, ArticleBody.article_id, article_ids)
+    return len(df), paths
+
+
+def _archive_rates(db, cutoff: datetime, run_tag: str) -> tuple:
+    """Archive rates dated before cutoff (dates kept as epoch days); returns (rows, paths)"""
+    columns = [
+        type_coerce(column, Integer).label(column.name) if column.name == 'date' else column
+        for column in Rate.__table__.columns
+    ]
+    stmt = select(*columns).where(Rate.date < to_epoch_day(cutoff))
+    df = read_frame(db, stmt)
+    if df.empty:
+        return 0, []
+
+    paths = _write_partitions(df, 'rates', epoch_days_to_datetime(df['date']).dt.strftime('%Y-%m'), run_tag)
+    _delete_batched(db, Rate.__table__, Rate.id, df['id'].tolist())
+    return len(df), paths
+
+
+def archive_cold_data(news_days: int = NEWS_RETENTION_DAYS, rates_days: int = RATES_RETENTION_DAYS) -> dict:
+    """
+    Move cold rows to the Parquet archive, then compact the database
+    Files are written before the rows are deleted in one transaction; if the
+    delete fails the new files are removed again, so rows are never in both places.
+    Returns {table: rows archived}.
+    """
+    if not PYARROW_AVAILABLE:
+        print("⚠️  pyarrow not available - skipping archive")
+        return {}
+
+    now = datetime.utcnow()
+    run_tag = now.strftime('%Y%m%dT%H%M%S')
+    counts = {}
+    paths = []
+
+    db = SessionLocal()
+    try:
+        if news_days:
+            counts['news_articles'], written = _archive_news(db, now - timedelta(days=news_days), run_tag)
+            paths.extend(written)
+        if rates_days:
+            counts['rates'], written = _archive_rates(db, now - timedelta(days=rates_days), run_tag)
+            paths.extend(written)
+        db.commit()
+    except Exception:
+        db.rollback()
+        for path in paths:
+            os.remove(path)
+        raise
+    finally:
+        db.close()
+
+    if any(counts.values()):
+        compact_database(optimize_fts=bool(counts.get('news_articles')))
+
+    return counts
+
+
+def compact_database(optimize_fts: bool = True) -> int:
+    """
+    Merge the full-text index segments, hand free pages back to the filesystem
+    (incremental vacuum) and truncate the WAL. Returns the number of pages freed.
+    On PostgreSQL the archived tables are VACUUM ANALYZEd instead (returns 0).
+    """
+    if engine.dialect.name == 'postgresql':
+        # VACUUM cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text("VACUUM (ANALYZE) news_articles, article_bodies, article_tags, rates"))
+        return 0
+
+    with engine.begin() as conn:
+        if optimize_fts:
+            conn.execute(text(f"INSERT INTO {NEWS_FTS_TABLE} ({NEWS_FTS_TABLE}) VALUES ('optimize')"))
+        incremental = conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+
+    if not incremental:
+        enable_incremental_vacuum()  # The full VACUUM already compacts everything
+
+    with engine.connect() as conn:
+        free_pages = conn.execute(text("PRAGMA freelist_count")).scalar()
+
+    # incremental_vacuum frees one page per statement step, so run it as a script
+    raw = engine.raw_connection()
+    try:
+        raw.driver_connection.executescript("PRAGMA incremental_vacuum; PRAGMA wal_checkpoint(TRUNCATE);")
+    finally:
+        raw.close()
+
+    return free_pages
+
+
+def enable_incremental_vacuum() -> None:
+    """
+    Switch an existing database to auto_vacuum=INCREMENTAL (new databases get it
+    from the engine profile). Needs one full VACUUM, which renumbers news_articles
+    rowids, so the full-text index is rebuilt afterwards.
+    """
+    raw = engine.raw_connection()
+    try:
+        raw.driver_connection.executescript("PRAGMA auto_vacuum = INCREMENTAL; VACUUM;")
+    finally:
+        raw.close()
+
+    with engine.begin() as conn:
+        rebuild_news_fts(conn)
+
+
+def read_archive(table_name: str, columns: list = None, filter_expression=None, archive_dir: str = ARCHIVE_DIR):
+    """
+    Archived rows of a table as a DataFrame (pyarrow dataset, month partitions pruned
+    by filter_expression on the 'month' column), or None if nothing is archived
+    """
+    if not PYARROW_AVAILABLE or not archive_files(table_name, archive_dir):
+        return None
+
+    dataset = ds.dataset(os.path.join(archive_dir, table_name), format='parquet', partitioning='hive')
+    return dataset.to_table(columns=columns, filter=filter_expression).to_pandas()
+
+
+if __name__ == "__main__":
+    # Archive cold rows and refresh the snapshots (which would otherwise still hold them)
+    from lib.snapshots import export_snapshots
+
+    counts = archive_cold_data()
+    for name, count in counts.items():
+        print(f"  {name}: {count:,} rows archived")
+    if any(counts.values()):
+        export_snapshots()
+    print(f"✅ Archive up to date in {ARCHIVE_DIR}")
@@ -0,0 +1,129 @@
+"""
+Compressed article bodies
+Full article text lives in article_bodies, compressed with a dictionary trained on
+our own corpus, and is only decompressed when a single article is opened
+"""
+
+import os
+import sys
+
+from sqlalchemy import func, select
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.compression import DEFAULT_CODEC, compress, decompress, train_dictionary
+from lib.database import ArticleBody, CompressionDictionary, SessionLocal, bulk_upsert, load_dictionary
+
+# Bodies needed before a dictionary is worth training (fewer gives a poor dictionary)
+MIN_TRAINING_SAMPLES = 100
+
+# Most recent bodies used as training samples
+TRAINING_SAMPLE_LIMIT = 2000
+
+# Bodies recompressed per batch after training
+RECOMPRESS_BATCH_SIZE = 500
+
+# Stored form of a body; select these and pass them to body_text() (works on every backend,
+# unlike the SQLite-only article_body() SQL function the search view uses)
+BODY_COLUMNS = (ArticleBody.body, ArticleBody.codec, ArticleBody.dictionary_id)
+
+
+def body_text(db, body, codec: str, dictionary_id):
+    """Decompressed text of a stored body"""
+    if body is None:
+        return None
+    return decompress(body, codec, load_dictionary(db, dictionary_id))
+
+
+def current_dictionary(db, codec: str = DEFAULT_CODEC):
+    """Newest trained dictionary for codec, or None"""
+    return db.execute(
+        select(CompressionDictionary)
+        .where(CompressionDictionary.codec == codec)
+        .order_by(CompressionDictionary.id.desc())
+        .limit(1)
+    ).scalar()
+
+
+def _body_row(article_id: str, content: str, dictionary, codec: str) -> dict:
+    """article_bodies row for one article's text"""
+    return {
+        'article_id': article_id,
+        'body': compress(content, codec, dictionary.dictionary if dictionary else None),
+        'codec': codec,
+        'dictionary_id': dictionary.id if dictionary else None,
+        'raw_size': len(content.encode()),
+    }
+
+
+def store_article_bodies(db, bodies: dict, codec: str = DEFAULT_CODEC) -> int:
+    """
+    Compress and upsert {article_id: full_content}; empty bodies are skipped
+    Trains the first dictionary once enough bodies exist. Does not commit.
+    Returns number of bodies written.
+    """
+    dictionary = current_dictionary(db, codec)
+    rows = [
+        _body_row(article_id, content, dictionary, codec)
+        for article_id, content in bodies.items() if content
+    ]
+    stored = bulk_upsert(db, ArticleBody, rows, index_elements=['article_id'])
+
+    if dictionary is None and db.query(func.count(ArticleBody.article_id)).scalar() >= MIN_TRAINING_SAMPLES:
+        train_body_dictionary(db, codec)
+
+    return stored
+
+
+def load_article_body(db, article_id: str):
+    """Decompressed full text of one article, or None if it has none"""
+    row = db.execute(select(*BODY_COLUMNS).where(ArticleBody.article_id == article_id)).first()
+    return body_text(db, *row) if row else None
+
+
+def train_body_dictionary(db, codec: str = DEFAULT_CODEC) -> int:
+    """
+    Train a new dictionary on recent bodies and recompress every body with it
+    Does not commit. Returns the new dictionary id (None if there are too few bodies).
+    """
+    samples = [
+        body_text(db, *row) for row in db.execute(
+            select(*BODY_COLUMNS).order_by(ArticleBody.updated_at.desc()).limit(TRAINING_SAMPLE_LIMIT)
+        )
+    ]
+    if len(samples) < MIN_TRAINING_SAMPLES:
+        return None
+
+    dictionary = CompressionDictionary(
+        codec=codec, dictionary=train_dictionary(samples, codec), sample_count=len(samples)
+    )
+    db.add(dictionary)
+    db.flush()
+
+    article_ids = db.execute(select(ArticleBody.article_id)).scalars().all()
+    for start in range(0, len(article_ids), RECOMPRESS_BATCH_SIZE):
+        batch = article_ids[start:start + RECOMPRESS_BATCH_SIZE]
+        stored = db.execute(
+            select(ArticleBody.article_id, *BODY_COLUMNS).where(ArticleBody.article_id.in_(batch))
+        ).all()
+        rows = [
+            _body_row(article_id, body_text(db, *body), dictionary, codec) for article_id, *body in stored
+        ]
+        bulk_upsert(db, ArticleBody, rows, index_elements=['article_id'])
+
+    return dictionary.id
+
+
+if __name__ == "__main__":
+    # Retrain the dictionary and recompress all bodies when run directly
+    db = SessionLocal()
+    try:
+        dictionary_id = train_body_dictionary(db)
+        if dictionary_id is None:
+            print(f"⚠️  Fewer than {MIN_TRAINING_SAMPLES} article bodies - nothing to train on")
+        else:
+            db.commit()
+            raw, stored = db.query(func.sum(ArticleBody.raw_size), func.sum(func.length(ArticleBody.body))).one()
+            print(f"✅ Trained dictionary {dictionary_id}: {raw or 0:,} bytes of text stored in {stored or 0:,}")
+    finally:
+        db.close()
@@ -0,0 +1,158 @@
+"""
+Date keys
+Time-keyed tables store integer epoch days (days since 1970-01-01) and the
+monthly views integer epoch months (months since 1970-01). Helpers here convert
+between those keys, dates/ISO strings, SQL expressions and datetime64 columns.
+"""
+
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+EPOCH = date(1970, 1, 1)
+_EPOCH_ORDINAL = EPOCH.toordinal()
+
+# Julian day number of 1970-01-01 00:00 (SQLite julianday())
+_EPOCH_JULIAN_DAY = 2440587.5
+
+
+# === PYTHON ===
+
+def _as_date(value) -> date:
+    """date for a date/datetime or a 'YYYY-MM-DD' / 'YYYY-MM' string (months map to their first day)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return date.fromisoformat(value if len(value) > 7 else f"{value}-01")
+    raise TypeError(f"Not a date: {value!r}")
+
+
+def to_epoch_day(value) -> int:
+    """Epoch day of a date, datetime or ISO string (ints pass through)"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return _as_date(value).toordinal() - _EPOCH_ORDINAL
+
+
+def from_epoch_day(day: int) -> date:
+    return date.fromordinal(day + _EPOCH_ORDINAL)
+
+
+def to_epoch_month(value) -> int:
+    """Epoch month of a date, datetime or ISO string (ints pass through)"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    value = _as_date(value)
+    return (value.year - 1970) * 12 + value.month - 1
+
+
+def from_epoch_month(month: int) -> date:
+    """First day of an epoch month"""
+    year, month_index = divmod(month, 12)
+    return date(1970 + year, month_index + 1, 1)
+
+
+def epoch_day_to_month(day: int) -> int:
+    return to_epoch_month(from_epoch_day(day))
+
+
+def week_start(day: int) -> int:
+    """Epoch day of the Monday on or before day (1970-01-01 was a Thursday)"""
+    return day - (day + 3) % 7
+
+
+# === SQL ===
+# Expressions for SQLite unless dialect='postgresql' (the ISO converters are SQLite-only migrations)
+
+def sql_iso_to_epoch_day(expression: str) -> str:
+    """SQL converting a 'YYYY-MM-DD' or 'YYYY-MM' text expression to an epoch day"""
+    iso = f"CASE WHEN length({expression}) = 7 THEN {expression} || '-01' ELSE {expression} END"
+    return f"CAST(julianday({iso}) - {_EPOCH_JULIAN_DAY} AS INTEGER)"
+
+
+def sql_iso_to_epoch_month(expression: str) -> str:
+    """SQL converting a 'YYYY-MM' (or longer ISO) text expression to an epoch month"""
+    return (
+        f"((CAST(substr({expression}, 1, 4) AS INTEGER) - 1970) * 12 "
+        f"+ CAST(substr({expression}, 6, 2) AS INTEGER) - 1)"
+    )
+
+
+def sql_epoch_day_to_month(expression: str, dialect: str = 'sqlite') -> str:
+    """SQL converting an epoch-day expression to its epoch month"""
+    if dialect == 'postgresql':
+        day = f"(DATE '1970-01-01' + {expression})"
+        return f"CAST((EXTRACT(YEAR FROM {day}) - 1970) * 12 + EXTRACT(MONTH FROM {day}) - 1 AS INTEGER)"
+    return sql_iso_to_epoch_month(f"date({expression} * 86400, 'unixepoch')")
+
+
+def sql_epoch_day_to_year(expression: str, dialect: str = 'sqlite') -> str:
+    if dialect == 'postgresql':
+        return f"CAST(EXTRACT(YEAR FROM DATE '1970-01-01' + {expression}) AS INTEGER)"
+    return f"CAST(strftime('%Y', {expression} * 86400, 'unixepoch') AS INTEGER)"
+
+
+def sql_week_start(expression: str) -> str:
+    """SQL for the Monday on or before an epoch day (sign-safe modulo, same on every backend)"""
+    return f"({expression} - (({expression} + 3) % 7 + 7) % 7)"
+
+
+# === PANDAS ===
+
+def epoch_days_to_datetime(values) -> pd.Series:
+    """datetime64 Series from epoch days (no string parsing)"""
+    values = pd.Series(values)
+    return pd.Series(pd.to_datetime(values, unit='D'), index=values.index, name=values.name)
+
+
+def epoch_months_to_datetime(values) -> pd.Series:
+    """datetime64 Series (first of month) from epoch months"""
+    values = pd.Series(values)
+    months = values.to_numpy(dtype='float64')
+    stamps = np.where(np.isnan(months), np.datetime64('NaT'), months.astype('int64').astype('datetime64[M]'))
+    return pd.Series(stamps.astype('datetime64[ns]'), index=values.index, name=values.name)
+
+
+# === COLUMN TYPES ===
+
+class EpochDay(TypeDecorator):
+    """Integer epoch-day column exposed as datetime.date (also binds ISO strings)"""
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_epoch_day(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_epoch_day(value)
+
+
+class EpochMonth(TypeDecorator):
+    """Integer epoch-month column exposed as datetime.date (first of month)"""
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_epoch_month(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_epoch_month(value)
+
+
+def to_epoch_key(value, column_type) -> int:
+    """Epoch key of a date/ISO string for an EpochDay/EpochMonth column"""
+    if isinstance(column_type, EpochMonth):
+        return to_epoch_month(value)
+    return to_epoch_day(value)
+
+
+def key_to_datetime(values, column_type) -> pd.Series:
+    """Convert raw integer keys of an EpochDay/EpochMonth column to datetime64"""
+    if isinstance(column_type, EpochMonth):
+        return epoch_months_to_datetime(values)
+    return epoch_days_to_datetime(values)
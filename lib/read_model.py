@@ -0,0 +1,175 @@
+"""
+Read model for the dashboards
+Core selects over just the columns a page shows, returned as DataFrames or plain
+row tuples, so cached page data never holds (or pickles) ORM instances
+"""
+
+import os
+import sys
+
+import pandas as pd
+from sqlalchemy import Integer, func, select, type_coerce
+from sqlalchemy.orm import Session
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.database import DieselPriceRollup, NewsArticle
+from lib.dates import key_to_datetime, to_epoch_key
+from lib.rollups import ROLLUP_GRAINS, period_key, period_to_datetime
+
+# Rows per round trip when streaming a large read from PostgreSQL
+READ_CHUNK_ROWS = 10000
+
+# Columns of the regional diesel views (diesel_price_rollups)
+DIESEL_ROLLUP_COLUMNS = ['region_code', 'period', 'avg_price', 'spread_vs_nus']
+
+# Columns the news list/detail views render (article bodies are loaded separately)
+NEWS_LIST_COLUMNS = [
+    NewsArticle.id,
+    NewsArticle.source,
+    NewsArticle.title,
+    NewsArticle.url,
+    NewsArticle.published_at,
+    NewsArticle.summary,
+    NewsArticle.tags,
+    NewsArticle.importance,
+    NewsArticle.notes,
+    NewsArticle.read,
+]
+
+# Columns of the compact headline list on the overview page
+NEWS_HEADLINE_COLUMNS = [
+    NewsArticle.id,
+    NewsArticle.source,
+    NewsArticle.title,
+    NewsArticle.url,
+    NewsArticle.published_at,
+    NewsArticle.importance,
+]
+
+
+def read_frame(db, stmt) -> pd.DataFrame:
+    """
+    DataFrame of a select/text statement on a Session or Connection
+    On PostgreSQL rows stream through a server-side cursor, READ_CHUNK_ROWS at a
+    time, instead of the driver buffering the whole result client-side first.
+    """
+    conn = db.connection() if isinstance(db, Session) else db
+    if conn.dialect.name != 'postgresql':
+        return pd.read_sql(stmt, conn)
+
+    result = conn.execute(stmt, execution_options={'stream_results': True, 'yield_per': READ_CHUNK_ROWS})
+    columns = list(result.keys())
+    frames = [
+        pd.DataFrame.from_records(rows, columns=columns, coerce_float=True) for rows in result.partitions()
+    ]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+
+def _key_column(model):
+    """The single primary-key column of a metrics model (date or month)"""
+    return model.__table__.primary_key.columns.values()[0]
+
+
+def _labelled(model, columns: dict) -> list:
+    """Select list for {model column: output name}"""
+    return [model.__table__.c[column].label(name) for column, name in columns.items()]
+
+
+def metrics_frame(db, model, columns: dict, start=None) -> pd.DataFrame:
+    """
+    Metrics rows as a DataFrame, oldest first, with the date/month key as datetime64
+    columns: {model column: DataFrame column}; start: first date/month to include (date or ISO string)
+    """
+    key = _key_column(model)
+    select_list = [
+        # Key as raw epoch integers, converted in one vectorized step below
+        (type_coerce(key, Integer) if column == key.name else model.__table__.c[column]).label(name)
+        for column, name in columns.items()
+    ]
+    stmt = select(*select_list).order_by(key)
+    if start:
+        stmt = stmt.where(key >= start)
+
+    return _with_datetime_key(read_frame(db, stmt), key, columns)
+
+
+def snapshot_frame(snapshot: pd.DataFrame, model, columns: dict, start=None) -> pd.DataFrame:
+    """metrics_frame over a columnar snapshot of the model's table (raw epoch keys)"""
+    key = _key_column(model)
+    if start:
+        snapshot = snapshot[snapshot[key.name] >= to_epoch_key(start, key.type)]
+    df = snapshot.sort_values(key.name).reset_index(drop=True).rename(columns=columns)
+    return _with_datetime_key(df, key, columns)
+
+
+def _with_datetime_key(df: pd.DataFrame, key, columns: dict) -> pd.DataFrame:
+    """Convert the raw epoch key column (if selected) to datetime64 in place"""
+    key_name = columns.get(key.name)
+    if key_name:
+        df[key_name] = key_to_datetime(df[key_name], key.type)
+    return df
+
+
+def diesel_rollup_frame(db, grain: str = 'week', start=None, regions: list = None) -> pd.DataFrame:
+    """
+    Regional diesel prices per week/month/year from the rollups (a few hundred rows
+    instead of the full diesel_prices history), oldest first
+    Columns DIESEL_ROLLUP_COLUMNS with period as datetime64 (first day of the period).
+    """
+    if grain not in ROLLUP_GRAINS:
+        raise ValueError(f"Unknown grain: {grain}")
+
+    table = DieselPriceRollup.__table__
+    stmt = select(*(table.c[column] for column in DIESEL_ROLLUP_COLUMNS)).where(table.c.grain == grain)
+    if start:
+        stmt = stmt.where(table.c.period >= period_key(grain, start))
+    if regions:
+        stmt = stmt.where(table.c.region_code.in_(regions))
+
+    df = read_frame(db, stmt.order_by(table.c.period, table.c.region_code))
+    df['period'] = period_to_datetime(df['period'], grain)
+    return df
+
+
+def diesel_rollup_snapshot_frame(snapshot: pd.DataFrame, grain: str = 'week', start=None,
+                                 regions: list = None) -> pd.DataFrame:
+    """diesel_rollup_frame over a columnar snapshot of diesel_price_rollups"""
+    rows = snapshot['grain'] == grain
+    if start:
+        rows &= snapshot['period'] >= period_key(grain, start)
+    if regions:
+        rows &= snapshot['region_code'].isin(regions)
+
+    df = snapshot.loc[rows, DIESEL_ROLLUP_COLUMNS].sort_values(['period', 'region_code']).reset_index(drop=True)
+    df['period'] = period_to_datetime(df['period'], grain)
+    return df
+
+
+def latest_metrics(db, model, columns: dict, count: int = 2) -> list:
+    """The newest count metrics rows (newest first) as named row tuples"""
+    key = _key_column(model)
+    stmt = select(*_labelled(model, columns)).order_by(key.desc()).limit(count)
+    return db.execute(stmt).all()
+
+
+def news_select(columns: list = None):
+    """Core select of news list columns; callers add filters and ordering"""
+    return select(*(columns or NEWS_LIST_COLUMNS))
+
+
+def recent_news(db, min_importance: int = 3, limit: int = 5) -> list:
+    """Newest headlines at or above min_importance"""
+    stmt = (
+        news_select(NEWS_HEADLINE_COLUMNS)
+        .where(NewsArticle.importance >= min_importance)
+        .order_by(NewsArticle.published_at.desc())
+        .limit(limit)
+    )
+    return db.execute(stmt).all()
+
+
+def news_source_counts(db) -> dict:
+    """{source: article count}"""
+    stmt = select(NewsArticle.source, func.count()).group_by(NewsArticle.source)
+    return dict(db.execute(stmt).all())
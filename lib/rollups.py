@@ -0,0 +1,142 @@
+"""
+Incrementally maintained rollups
+Weekly/monthly/yearly regional diesel price aggregates, recomputed only for the
+periods touched by an ingest so regional charts never scan the full history
+"""
+
+from datetime import datetime
+import os
+import sys
+
+import pandas as pd
+from sqlalchemy import bindparam, select, text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.database import SessionLocal, DieselPrice, dialect_name
+from lib.dates import (
+    epoch_day_to_month, epoch_days_to_datetime, epoch_months_to_datetime, from_epoch_day,
+    from_epoch_month, sql_epoch_day_to_month, sql_epoch_day_to_year, sql_week_start, to_epoch_day,
+    week_start
+)
+
+ROLLUP_GRAINS = ['week', 'month', 'year']
+
+# Periods recomputed per statement (keeps the IN list well under SQLite's variable limit)
+PERIOD_BATCH_SIZE = 500
+
+NATIONAL_REGION = 'NUS'
+
+
+def _period_bounds(grain: str, day: int) -> tuple:
+    """(period, first_day, last_day) of the period containing an epoch day"""
+    if grain == 'week':
+        monday = week_start(day)
+        return monday, monday, monday + 6
+    if grain == 'month':
+        month = epoch_day_to_month(day)
+        return month, to_epoch_day(from_epoch_month(month)), to_epoch_day(from_epoch_month(month + 1)) - 1
+    year = from_epoch_day(day).year
+    return year, to_epoch_day(f"{year}-01-01"), to_epoch_day(f"{year}-12-31")
+
+
+def period_key(grain: str, value) -> int:
+    """Rollup period containing a date (date, ISO string or epoch day)"""
+    return _period_bounds(grain, to_epoch_day(value))[0]
+
+
+def period_to_datetime(values, grain: str) -> pd.Series:
+    """datetime64 Series (first day of each period) from rollup period keys"""
+    if grain == 'week':
+        return epoch_days_to_datetime(values)
+    if grain == 'month':
+        return epoch_months_to_datetime(values)
+    values = pd.Series(values)
+    return pd.Series(pd.to_datetime(values.astype(str), format='%Y'), index=values.index, name=values.name)
+
+
+def _bucket_sql(grain: str, dialect: str) -> str:
+    """SQL expression mapping a diesel_prices.date (epoch day) to its period key"""
+    if grain == 'week':
+        return sql_week_start('date')  # Epoch day of the Monday on or before the date
+    if grain == 'month':
+        return sql_epoch_day_to_month('date', dialect)  # Epoch month
+    return sql_epoch_day_to_year('date', dialect)  # Calendar year
+
+
+def _refresh_periods(db, grain: str, periods: list, start: str, end: str) -> None:
+    """Recompute one grain's rollup rows for the given periods, then their NUS spreads"""
+    bucket = _bucket_sql(grain, dialect_name(db))
+    params = {'grain': grain, 'start': start, 'end': end, 'periods': periods, 'now': datetime.utcnow()}
+
+    db.execute(text(f"""
+        INSERT INTO diesel_price_rollups (
+            grain, region_code, period, avg_price, min_price, max_price,
+            last_price, last_date, observations, updated_at
+        )
+        SELECT :grain, region_code, period, AVG(price), MIN(price), MAX(price),
+               MAX(CASE WHEN recency = 1 THEN price END), MAX(date), COUNT(*), :now
+        FROM (
+            SELECT region_code, {bucket} AS period, date, price,
+                   ROW_NUMBER() OVER (PARTITION BY region_code, {bucket} ORDER BY date DESC) AS recency
+            FROM diesel_prices
+            WHERE date BETWEEN :start AND :end AND {bucket} IN :periods
+        ) AS dated
+        GROUP BY region_code, period
+        ON CONFLICT (grain, region_code, period) DO UPDATE SET
+            avg_price = excluded.avg_price,
+            min_price = excluded.min_price,
+            max_price = excluded.max_price,
+            last_price = excluded.last_price,
+            last_date = excluded.last_date,
+            observations = excluded.observations,
+            updated_at = excluded.updated_at
+    """).bindparams(bindparam('periods', expanding=True)), params)
+
+    db.execute(text("""
+        UPDATE diesel_price_rollups
+        SET spread_vs_nus = avg_price - (
+            SELECT nus.avg_price FROM diesel_price_rollups AS nus
+            WHERE nus.grain = diesel_price_rollups.grain
+              AND nus.period = diesel_price_rollups.period
+              AND nus.region_code = :national
+        )
+        WHERE grain = :grain AND period IN :periods
+    """).bindparams(bindparam('periods', expanding=True)),
+        {'grain': grain, 'periods': periods, 'national': NATIONAL_REGION})
+
+
+def refresh_diesel_rollups(db, dates=None) -> int:
+    """
+    Recompute rollups for every period containing one of dates (dates, ISO strings or epoch days)
+    dates=None rebuilds from the full diesel_prices history.
+    Does not commit. Returns the number of (grain, period) buckets refreshed.
+    """
+    if dates is None:
+        dates = db.execute(select(DieselPrice.date).distinct()).scalars().all()
+
+    refreshed = 0
+    for grain in ROLLUP_GRAINS:
+        bounds = {}
+        for day in dates:
+            period, first, last = _period_bounds(grain, to_epoch_day(day))
+            bounds[period] = (first, last)
+
+        periods = sorted(bounds)
+        for start in range(0, len(periods), PERIOD_BATCH_SIZE):
+            batch = periods[start:start + PERIOD_BATCH_SIZE]
+            _refresh_periods(db, grain, batch, bounds[batch[0]][0], bounds[batch[-1]][1])
+        refreshed += len(periods)
+
+    return refreshed
+
+
+if __name__ == "__main__":
+    # Rebuild all rollups when run directly
+    db = SessionLocal()
+    try:
+        count = refresh_diesel_rollups(db)
+        db.commit()
+        print(f"✅ Rebuilt diesel rollups for {count} periods")
+    finally:
+        db.close()
@@ -0,0 +1,98 @@
+"""
+Full-text news search
+bm25-ranked queries and highlighted snippets over the news_articles_fts index
+(on PostgreSQL: ts_rank_cd over the news_articles.search_vector GIN index)
+"""
+
+import html
+import os
+import re
+import sys
+
+from sqlalchemy import column, func, literal_column, table, text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.database import NEWS_FTS_TABLE, NEWS_SEARCH_VECTOR, NewsArticle, engine, rebuild_news_fts
+
+NEWS_FTS = table(NEWS_FTS_TABLE, column('rowid'))
+
+# Control characters mark matches inside snippets; highlight_snippet turns them into <mark>
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+SNIPPET_TOKENS = 24
+
+
+def to_fts_query(search_query: str) -> str:
+    """Turn free text into a safe FTS5 query: every term must match, the last as a prefix"""
+    terms = re.findall(r'\w+', search_query or '')
+    if not terms:
+        return ''
+
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'  # Match-as-you-type on the last word
+    return ' '.join(quoted)
+
+
+def to_tsquery_text(search_query: str) -> str:
+    """PostgreSQL counterpart of to_fts_query: 'term & term & last:*'"""
+    terms = re.findall(r'\w+', search_query or '')
+    if not terms:
+        return ''
+    return ' & '.join(terms) + ':*'
+
+
+def _match_news_postgres(query, search_query: str):
+    """match_news on PostgreSQL (titles and summaries only; bodies are not indexed there)"""
+    tsquery = func.to_tsquery('english', to_tsquery_text(search_query))
+    vector = literal_column(f"news_articles.{NEWS_SEARCH_VECTOR}")
+    snippet = func.ts_headline(
+        'english', func.coalesce(NewsArticle.summary, NewsArticle.title), tsquery,
+        f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords={SNIPPET_TOKENS}, MinWords=8"
+    )
+
+    return (
+        query.filter(vector.op('@@')(tsquery))
+        .add_columns(snippet.label('snippet'))
+        .order_by(func.ts_rank_cd(vector, tsquery).desc())
+    )
+
+
+def match_news(query, search_query: str):
+    """
+    Restrict a query (ORM Query or Core select) over NewsArticle to full-text matches of search_query
+    Adds a 'snippet' column and orders by bm25 relevance (title weighted highest).
+    Returns the query unchanged if search_query has no searchable terms.
+    """
+    fts_query = to_fts_query(search_query)
+    if not fts_query:
+        return query
+    if engine.dialect.name == 'postgresql':
+        return _match_news_postgres(query, search_query)
+
+    fts = literal_column(NEWS_FTS_TABLE)
+    snippet = func.snippet(fts, -1, HIGHLIGHT_START, HIGHLIGHT_END, '…', SNIPPET_TOKENS)
+    # Column weights: article_id (unindexed), title, summary, full_content
+    rank = func.bm25(fts, 0.0, 10.0, 4.0, 1.0)
+
+    return (
+        # Join on rowid: reading article_id would fetch (and decompress) every matched row
+        query.join(NEWS_FTS, NEWS_FTS.c.rowid == literal_column('news_articles.rowid'))
+        .filter(text(f"{NEWS_FTS_TABLE} MATCH :fts_query").bindparams(fts_query=fts_query))
+        .add_columns(snippet.label('snippet'))
+        .order_by(rank)
+    )
+
+
+def highlight_snippet(snippet: str) -> str:
+    """HTML-escape a snippet and wrap its matched terms in <mark>"""
+    escaped = html.escape(snippet or '')
+    return escaped.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+
+
+if __name__ == "__main__":
+    # Rebuild the full-text index when run directly
+    with engine.begin() as conn:
+        count = rebuild_news_fts(conn)
+    print(f"✅ Rebuilt news full-text index ({count} articles)")
@@ -0,0 +1,157 @@
+"""
+Columnar snapshots of the warehouse
+Exports tables and per-series slices to Arrow IPC (memory-mappable) and Parquet
+files so pages can load multi-year history without going through the ORM
+"""
+
+from datetime import datetime
+from functools import lru_cache
+import json
+import os
+import sys
+
+from sqlalchemy import func, text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.database import SessionLocal, ScraperRun, engine
+from lib.dates import epoch_days_to_datetime
+from lib.read_model import read_frame
+
+# pyarrow is optional - without it pages simply read from SQLite
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshots")
+
+# Tables/views exported on every snapshot (news is filtered per request, so it stays in SQLite)
+SNAPSHOT_TABLES = [
+    'daily_metrics',
+    'macro_metrics',
+    'diesel_prices',
+    'diesel_price_rollups',
+    'observations',
+    'series',
+    'lanes',
+    'rates',
+]
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _write_atomic(path: str, write) -> None:
+    """Write via a temp file and rename, so readers never map a half-written file"""
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_table(table, path_base: str, parquet: bool = True) -> None:
+    """Write an Arrow table as uncompressed IPC (for memory mapping) and optionally Parquet"""
+    _write_atomic(f"{path_base}.arrow", lambda p: feather.write_feather(table, p, compression='uncompressed'))
+    if parquet:
+        _write_atomic(f"{path_base}.parquet", lambda p: pq.write_table(table, p))
+
+
+def export_snapshots(snapshot_dir: str = SNAPSHOT_DIR) -> dict:
+    """
+    Export SNAPSHOT_TABLES and one file per observation series
+    Returns {name: row_count}
+    """
+    if not PYARROW_AVAILABLE:
+        print("⚠️  pyarrow not available - skipping snapshot export")
+        return {}
+
+    series_dir = os.path.join(snapshot_dir, "series")
+    os.makedirs(series_dir, exist_ok=True)
+
+    counts = {}
+    with engine.connect() as conn:
+        for name in SNAPSHOT_TABLES:
+            df = read_frame(conn, text(f"SELECT * FROM {name}"))
+            _write_table(pa.Table.from_pandas(df, preserve_index=False), os.path.join(snapshot_dir, name))
+            counts[name] = len(df)
+
+            # Per-series slices for single-series charts
+            if name == 'observations':
+                for series_id, group in df.groupby('series_id'):
+                    slice_df = group[['period', 'value']].sort_values('period')
+                    table = pa.Table.from_pandas(slice_df, preserve_index=False)
+                    _write_table(table, os.path.join(series_dir, series_id), parquet=False)
+
+    manifest = {'exported_at': datetime.utcnow().isoformat(), 'tables': counts}
+
+    def write_manifest(path):
+        with open(path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    _write_atomic(os.path.join(snapshot_dir, MANIFEST_FILE), write_manifest)
+
+    return counts
+
+
+def feeds_snapshots(store_tables) -> bool:
+    """True if a scraper storing into store_tables (its STORE_TABLES) changes a snapshot"""
+    return not set(store_tables).isdisjoint(SNAPSHOT_TABLES)
+
+
+@lru_cache(maxsize=1)
+def snapshot_scrapers() -> tuple:
+    """Names of the scheduled scrapers that store into a snapshot table (e.g. not news)"""
+    from scrapers.scheduler import SCHEDULES  # Imported lazily: pages do not load the scrapers otherwise
+    return tuple(name for name, (_, scraper_class, _) in SCHEDULES.items()
+                 if feeds_snapshots(scraper_class.STORE_TABLES))
+
+
+def snapshot_is_fresh(snapshot_dir: str = SNAPSHOT_DIR) -> bool:
+    """True if the snapshot was exported after the last successful run of a scraper feeding it"""
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if not PYARROW_AVAILABLE or not os.path.exists(manifest_path):
+        return False
+
+    with open(manifest_path) as f:
+        exported_at = datetime.fromisoformat(json.load(f)['exported_at'])
+
+    db = SessionLocal()
+    try:
+        last_ingest = db.query(func.max(ScraperRun.completed_at)).filter(
+            ScraperRun.status == 'success',
+            ScraperRun.scraper_name.in_(snapshot_scrapers())
+        ).scalar()
+    finally:
+        db.close()
+
+    return last_ingest is None or exported_at >= last_ingest
+
+
+def load_snapshot(name: str, columns: list = None, snapshot_dir: str = SNAPSHOT_DIR):
+    """
+    Memory-map a table snapshot into a DataFrame
+    Returns None if no fresh snapshot exists (caller falls back to SQLite)
+    """
+    path = os.path.join(snapshot_dir, f"{name}.arrow")
+    if not os.path.exists(path) or not snapshot_is_fresh(snapshot_dir):
+        return None
+
+    return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
+def load_series_snapshot(series_id: str, snapshot_dir: str = SNAPSHOT_DIR):
+    """Memory-map one series' (period, value) history with datetime periods, or None if unavailable"""
+    df = load_snapshot(os.path.join("series", series_id), snapshot_dir=snapshot_dir)
+    if df is not None:
+        df['period'] = epoch_days_to_datetime(df['period'])
+    return df
+
+
+if __name__ == "__main__":
+    # Export snapshots when run directly
+    counts = export_snapshots()
+    for name, count in counts.items():
+        print(f"  {name}: {count:,} rows")
+    print(f"✅ Snapshots written to {SNAPSHOT_DIR}")
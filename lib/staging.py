@@ -0,0 +1,373 @@
+"""
+Staging database for ingest runs
+Scrapers write into a copy of the live database, which is validated and then
+published in a single step, so readers never see half-written loads and a
+failed run never touches the live dataset (SQLite only - on PostgreSQL every
+scraper commits its own transaction on the shared database)
+
+Publishing merges the scrapers' tables back row by row instead of replacing the
+live file, so writes made to the live database during the ingest (article edits,
+scheduler runs) are kept.
+"""
+
+import os
+import sqlite3
+import sys
+
+from sqlalchemy import Integer, UniqueConstraint
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.database import (
+    Base, DB_PATH, IS_POSTGRES, SQLITE_PRAGMAS, SessionLocal, WIDE_VIEW_COLUMNS,
+    _register_sql_functions, create_sqlite_engine, engine
+)
+
+STAGING_PATH = os.getenv("STAGING_DATABASE_PATH", f"{os.path.splitext(DB_PATH)[0]}.staging.db")
+
+# Ingest bookkeeping published with every staging database besides the scrapers' tables
+CACHE_TABLES = ('http_cache', 'circuit_breakers')
+
+# Tables whose rows belong to a parent row: replaced along with each parent row published
+CHILD_TABLES = {'article_tags': ('news_articles', 'article_id')}
+
+# Columns holding another table's surrogate id: staging ids are translated to the live
+# ids of the same rows (matched on their natural key), since both databases assign ids
+REFERENCES = {
+    ('rates', 'lane_id'): 'lanes',
+    ('article_bodies', 'dictionary_id'): 'compression_dictionaries',
+}
+
+# Row counts of the staging database when it was copied (see validate_staging)
+BASE_COUNTS_TABLE = "staging_base_counts"
+
+# Columns telling which copy of a row is newer
+TIMESTAMP_COLUMNS = ('updated_at', 'fetched_at')
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    """Raw sqlite3 connection that waits on locks like the engine profile does"""
+    return sqlite3.connect(path, timeout=SQLITE_PRAGMAS['busy_timeout'] / 1000)
+
+
+def _copy_database(source_path: str, target_path: str) -> None:
+    """Copy a database with the SQLite online backup API (one atomic write on the target)"""
+    source = _connect(source_path)
+    target = _connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def discard_staging(path: str = STAGING_PATH) -> None:
+    """Delete a staging database and its WAL/shared-memory files"""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def create_staging(path: str = STAGING_PATH) -> str:
+    """Start a staging database as a consistent copy of the live one"""
+    if IS_POSTGRES:
+        raise RuntimeError("Staging databases are SQLite copies; not available with a PostgreSQL DATABASE_URL")
+    discard_staging(path)
+    _copy_database(DB_PATH, path)
+
+    conn = _connect(path)
+    try:
+        with conn:
+            conn.execute(f"CREATE TABLE {BASE_COUNTS_TABLE} (table_name TEXT PRIMARY KEY, row_count INTEGER)")
+            conn.executemany(f"INSERT INTO {BASE_COUNTS_TABLE} VALUES (?, ?)", _table_counts(conn).items())
+    finally:
+        conn.close()
+    return path
+
+
+def bind_sessions(target_engine) -> None:
+    """Point SessionLocal (and so every scraper) at target_engine"""
+    SessionLocal.configure(bind=target_engine)
+
+
+def use_staging(path: str = STAGING_PATH):
+    """Route all scraper writes into the staging database; returns its engine"""
+    staging_engine = create_sqlite_engine(path)
+    bind_sessions(staging_engine)
+    return staging_engine
+
+
+def use_live() -> None:
+    """Route sessions back to the live database"""
+    bind_sessions(engine)
+
+
+def _table_counts(conn: sqlite3.Connection) -> dict:
+    """Row counts of every model table (views excluded)"""
+    counts = {}
+    for table in Base.metadata.sorted_tables:
+        if table.name in WIDE_VIEW_COLUMNS:
+            continue
+        try:
+            counts[table.name] = conn.execute(f"SELECT COUNT(*) FROM {table.name}").fetchone()[0]
+        except sqlite3.OperationalError:
+            counts[table.name] = None  # Table missing
+    return counts
+
+
+def _orphan_count(conn: sqlite3.Connection, table: str, column: str, parent) -> int:
+    """Rows of table whose column points at no row of the parent table"""
+    parent_key = _surrogate_key(parent) or parent.primary_key.columns.values()[0].name
+    return conn.execute(
+        f"SELECT COUNT(*) FROM {table} c WHERE c.{column} IS NOT NULL AND NOT EXISTS "
+        f"(SELECT 1 FROM {parent.name} p WHERE p.{parent_key} = c.{column})"
+    ).fetchone()[0]
+
+
+def validate_staging(path: str = STAGING_PATH, store_tables=()) -> list:
+    """
+    Check a staging database before publishing
+    store_tables: STORE_TABLES of each scraper whose tables are to be published
+    Returns a list of problems (empty if it is safe to publish)
+    """
+    problems = []
+    tables = {table_name for group in store_tables for table_name in group}
+
+    staging = _connect(path)
+    try:
+        integrity = staging.execute("PRAGMA integrity_check").fetchone()[0]
+        if integrity != 'ok':
+            problems.append(f"integrity_check: {integrity}")
+        for table_name, rowid, parent, _ in staging.execute("PRAGMA foreign_key_check").fetchall():
+            problems.append(f"{table_name}: row {rowid} references a missing {parent} row")
+
+        # Undeclared references publishing relies on (REFERENCES, CHILD_TABLES)
+        links = [(table, column, parent) for (table, column), parent in REFERENCES.items()]
+        links += [(child, column, parent) for child, (parent, column) in CHILD_TABLES.items()]
+        for table_name, column, parent in links:
+            if table_name in tables:
+                orphans = _orphan_count(staging, table_name, column, Base.metadata.tables[parent])
+                if orphans:
+                    problems.append(f"{table_name}: {orphans} rows reference a missing {parent} row")
+
+        # Scrapers only upsert, so a table that lost rows since the copy is a truncated load
+        base_counts = dict(staging.execute(f"SELECT table_name, row_count FROM {BASE_COUNTS_TABLE}").fetchall())
+        counts = _table_counts(staging)
+        for table_name, count in counts.items():
+            base_count = base_counts.get(table_name)
+            if count is None:
+                if base_count is not None:
+                    problems.append(f"{table_name}: missing from staging")
+            elif base_count is not None and count < base_count:
+                problems.append(f"{table_name}: {count} rows in staging < {base_count} when copied")
+
+        # A scraper that succeeded with all of its tables empty stored nothing
+        for group in store_tables:
+            if group and not any(counts.get(table_name) for table_name in group):
+                problems.append(f"{', '.join(group)}: empty in staging")
+    except sqlite3.OperationalError as e:
+        problems.append(f"unreadable staging database: {e}")
+    finally:
+        staging.close()
+
+    return problems
+
+
+def _surrogate_key(table):
+    """Name of the table's autoincrement integer id column, or None if its primary key is natural"""
+    keys = table.primary_key.columns.values()
+    if len(keys) == 1 and isinstance(keys[0].type, Integer):
+        return keys[0].name
+    return None
+
+
+def _match_key(table) -> list:
+    """
+    Columns identifying the same row in both databases: the natural unique key of a
+    table with a surrogate id, else the primary key (None: no natural key, rows are
+    compared on all their columns)
+    """
+    if _surrogate_key(table) is None:
+        return [column.name for column in table.primary_key.columns]
+    unique_keys = [index.columns for index in table.indexes if index.unique]
+    unique_keys += [constraint.columns for constraint in table.constraints if isinstance(constraint, UniqueConstraint)]
+    return [column.name for column in unique_keys[0]] if unique_keys else None
+
+
+def _same_row(table, left: str, right: str) -> str:
+    """SQL condition: left and right are the same row (by _match_key, or every non-id column)"""
+    surrogate = _surrogate_key(table)
+    columns = _match_key(table) or [column.name for column in table.columns if column.name != surrogate]
+    return " AND ".join(f"{left}.{column} IS {right}.{column}" for column in columns)
+
+
+def _map_ids(conn: sqlite3.Connection, table) -> None:
+    """Temporary table ids_<table> (staging_id, live_id) pairing each staging row with its live copy"""
+    surrogate = _surrogate_key(table)
+    conn.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS ids_{table.name} AS "
+        f"SELECT s.{surrogate} AS staging_id, MIN(m.{surrogate}) AS live_id "
+        f"FROM staging.{table.name} s JOIN main.{table.name} m ON {_same_row(table, 's', 'm')} "
+        f"GROUP BY s.{surrogate}"
+    )
+
+
+def _staging_select(conn: sqlite3.Connection, table, columns: list) -> tuple:
+    """
+    ({column: expression}, FROM clause) reading staging.<table> as s, with REFERENCES
+    columns translated to live ids (NULL when the referenced row has no live copy)
+    """
+    expressions = {}
+    from_clause = f"staging.{table.name} s"
+    for column in columns:
+        target = REFERENCES.get((table.name, column))
+        if target is None:
+            expressions[column] = f"s.{column}"
+            continue
+        _map_ids(conn, Base.metadata.tables[target])
+        from_clause += f" LEFT JOIN temp.ids_{target} ids_{column} ON ids_{column}.staging_id = s.{column}"
+        expressions[column] = f"ids_{column}.live_id"
+    return expressions, from_clause
+
+
+def _select_list(expressions: dict) -> str:
+    return ", ".join(f"{expression} AS {column}" for column, expression in expressions.items())
+
+
+def _merge_table(conn: sqlite3.Connection, table, keys_into: str = None) -> int:
+    """
+    Upsert the rows of staging.<table> that are new or newer than their live copy
+    (by TIMESTAMP_COLUMNS; tables without one take every changed row), matched on
+    the natural key so live surrogate ids stand and new rows get fresh ones. With
+    keys_into, the live primary keys of the published rows are saved to that
+    temporary table.
+    """
+    surrogate = _surrogate_key(table)
+    columns = [column.name for column in table.columns if column.name != surrogate]
+    keys = _match_key(table)
+    timestamp = next((name for name in TIMESTAMP_COLUMNS if name in table.c), None)
+
+    expressions, from_clause = _staging_select(conn, table, columns)
+    if keys and timestamp:
+        same_key = " AND ".join(f"m.{key} = {expressions[key]}" for key in keys)
+        newer = f"m.{timestamp} >= {expressions[timestamp]}"
+        live_copy = f"{same_key} AND {newer}"
+    else:
+        live_copy = " AND ".join(f"m.{column} IS {expressions[column]}" for column in columns)
+    conn.execute(f"CREATE TEMP TABLE publish_rows AS SELECT {_select_list(expressions)} FROM {from_clause} "
+                 f"WHERE NOT EXISTS (SELECT 1 FROM main.{table.name} m WHERE {live_copy})")
+    try:
+        insert = (f"INSERT INTO main.{table.name} ({', '.join(columns)}) "
+                  f"SELECT {', '.join(columns)} FROM temp.publish_rows WHERE true")
+        if keys:
+            updates = [column for column in columns if column not in keys]
+            insert += f" ON CONFLICT ({', '.join(keys)}) " + (
+                "DO UPDATE SET " + ", ".join(f"{column} = excluded.{column}" for column in updates)
+                if updates else "DO NOTHING"
+            )
+        conn.execute(insert)
+
+        if keys_into:
+            live_keys = [surrogate] if surrogate else [column.name for column in table.primary_key.columns]
+            conn.execute(
+                f"CREATE TEMP TABLE {keys_into} AS SELECT {', '.join(f'm.{key}' for key in live_keys)} "
+                f"FROM main.{table.name} m JOIN temp.publish_rows r ON {_same_row(table, 'm', 'r')}"
+            )
+        return conn.execute("SELECT COUNT(*) FROM temp.publish_rows").fetchone()[0]
+    finally:
+        conn.execute("DROP TABLE temp.publish_rows")
+
+
+def _replace_children(conn: sqlite3.Connection, table, parent_keys: str, foreign_key: str) -> None:
+    """Replace the live child rows of every published parent with their staging rows"""
+    columns = [column.name for column in table.columns]
+    expressions, from_clause = _staging_select(conn, table, columns)
+    conn.execute(f"DELETE FROM main.{table.name} WHERE {foreign_key} IN (SELECT * FROM temp.{parent_keys})")
+    conn.execute(f"INSERT INTO main.{table.name} ({', '.join(columns)}) "
+                 f"SELECT {_select_list(expressions)} FROM {from_clause} "
+                 f"WHERE {expressions[foreign_key]} IN (SELECT * FROM temp.{parent_keys})")
+
+
+def _append_runs(conn: sqlite3.Connection, scraper_names=None) -> int:
+    """
+    Copy the scraper_runs (and their phases) the ingest created after the live ones,
+    renumbered past the live ids so runs recorded live meanwhile are kept. Runs of
+    scrapers outside scraper_names lose their checkpoint: their rows were not
+    published, so the next run must not resume past them.
+    """
+    conn.execute(
+        "CREATE TEMP TABLE publish_runs AS SELECT s.id FROM staging.scraper_runs s WHERE NOT EXISTS ("
+        "SELECT 1 FROM main.scraper_runs m WHERE m.scraper_name IS s.scraper_name AND m.started_at IS s.started_at)"
+    )
+    try:
+        first_new, live_max = conn.execute(
+            "SELECT (SELECT MIN(id) FROM temp.publish_runs), (SELECT COALESCE(MAX(id), 0) FROM main.scraper_runs)"
+        ).fetchone()
+        if first_new is None:
+            return 0
+        offset = max(0, live_max + 1 - first_new)
+        published = ", ".join(f"'{name}'" for name in scraper_names or ())
+        for name, key in (('scraper_runs', 'id'), ('scraper_run_phases', 'run_id')):
+            columns = [column.name for column in Base.metadata.tables[name].columns]
+            select_list = []
+            for column in columns:
+                if column == key:
+                    column = f"{column} + {offset}"
+                elif column == 'checkpoint' and scraper_names is not None:
+                    column = f"CASE WHEN scraper_name IN ({published or 'NULL'}) THEN checkpoint END"
+                select_list.append(column)
+            conn.execute(f"INSERT INTO main.{name} ({', '.join(columns)}) SELECT {', '.join(select_list)} "
+                         f"FROM staging.{name} WHERE {key} IN (SELECT id FROM temp.publish_runs)")
+        return conn.execute("SELECT COUNT(*) FROM temp.publish_runs").fetchone()[0]
+    finally:
+        conn.execute("DROP TABLE temp.publish_runs")
+
+
+def publish_staging(path: str = STAGING_PATH, tables=(), scraper_names=None) -> dict:
+    """
+    Merge the scrapers' tables (their STORE_TABLES) from the staging database into
+    the live one, with the ingest's scraper runs and HTTP/circuit breaker state
+    scraper_names: scrapers whose tables are published (None = all); runs of the
+    others are copied without their resume checkpoint
+
+    Rows are matched on their natural keys and upserted only where the staging copy
+    is new or newer. Live surrogate ids are kept (references to them are translated,
+    see REFERENCES), and the only live rows deleted are the CHILD_TABLES rows of a
+    parent being replaced, so live writes made during the ingest survive.
+    Everything is one write transaction on the live file: WAL readers keep their
+    snapshot until it commits and then see the complete new dataset.
+    Returns {table: rows published}.
+    """
+    conn = _connect(DB_PATH)
+    conn.isolation_level = None  # Explicit transaction below
+    _register_sql_functions(conn, None)  # Used by the news FTS triggers
+    published = {}
+    try:
+        conn.execute("ATTACH DATABASE ? AS staging", (path,))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            merged = (set(tables) | set(CACHE_TABLES)) - set(CHILD_TABLES) - set(WIDE_VIEW_COLUMNS)
+            parents = {parent for parent, _ in CHILD_TABLES.values()}
+            # Referenced tables first, so their ids can be translated (and the FTS triggers
+            # on article_bodies find the dictionaries they decompress with)
+            referenced = set(REFERENCES.values())
+            order = sorted(Base.metadata.sorted_tables, key=lambda table: table.name not in referenced)
+            for table in order:
+                if table.name not in merged:
+                    continue
+                keys_into = f"publish_keys_{table.name}" if table.name in parents else None
+                published[table.name] = _merge_table(conn, table, keys_into)
+
+            for child, (parent, foreign_key) in CHILD_TABLES.items():
+                if parent in published:
+                    _replace_children(conn, Base.metadata.tables[child], f"publish_keys_{parent}", foreign_key)
+                    conn.execute(f"DROP TABLE temp.publish_keys_{parent}")
+
+            published['scraper_runs'] = _append_runs(conn, scraper_names)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    return published
@@ -3,7 +3,6 @@ Utility functions for the Freight Intelligence Portal
 """
 
 from datetime import datetime, timedelta
-from typing import List, Dict
 import os
 from dotenv import load_dotenv
 
@@ -30,21 +29,6 @@ def days_ago(days: int) -> datetime:
     return datetime.now() - timedelta(days=days)
 
 
-def get_all_tags_from_db(db) -> List[str]:
-    """Extract all unique tags from news articles"""
-    from lib.database import NewsArticle
-
-    articles = db.query(NewsArticle.tags).filter(NewsArticle.tags.isnot(None)).all()
-
-    all_tags = set()
-    for (tags_str,) in articles:
-        if tags_str:
-            tags = [t.strip() for t in tags_str.split(',')]
-            all_tags.update(tags)
-
-    return sorted(list(all_tags))
-
-
 def calculate_percent_change(old_value: float, new_value: float) -> float:
     """Calculate percentage change"""
     if old_value == 0:
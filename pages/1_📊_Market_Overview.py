@@ -12,7 +12,9 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from lib.database import SessionLocal, DailyMetric, MacroMetric, NewsArticle, Lane, Rate
+from lib.database import ThreadSession, DailyMetric, MacroMetric, Lane
+from lib.read_model import latest_metrics, metrics_frame, recent_news, snapshot_frame
+from lib.snapshots import load_snapshot
 
 st.set_page_config(
     page_title="Market Overview - Freight Intelligence",
@@ -83,105 +85,104 @@ st.markdown("""
 
 # === FUNCTIONS ===
 
+# Model column -> field name (KPI tiles read these as row attributes)
+DAILY_KPI_COLUMNS = {
+    'date': 'date',
+    'diesel_usd_per_gal': 'diesel_usd_per_gal',
+    'gas_price': 'gas_price',
+    'oil_price': 'oil_price'
+}
+
+MACRO_KPI_COLUMNS = {
+    'month': 'month',
+    'cass_shipments_index': 'cass_shipments_index',
+    'cass_expenditures_index': 'cass_expenditures_index',
+    'ata_tonnage_index': 'ata_tonnage_index',
+    'ism_pmi': 'ism_pmi'
+}
+
+# Model/snapshot column -> sparkline DataFrame column
+DAILY_TREND_COLUMNS = {
+    'date': 'date',
+    'diesel_usd_per_gal': 'diesel',
+    'gas_price': 'gas_price',
+    'oil_price': 'oil_price'
+}
+
+MACRO_TREND_COLUMNS = {
+    'month': 'month',
+    'cass_shipments_index': 'cass_shipments',
+    'cass_expenditures_index': 'cass_expenditures',
+    'ata_tonnage_index': 'ata_tonnage',
+    'industrial_production': 'industrial_production',
+    'ism_pmi': 'ism_pmi'
+}
+
+
 @st.cache_data(ttl=300)
 def get_latest_metrics():
-    """Get most recent metrics for all indicators"""
-    db = SessionLocal()
+    """Get most recent metrics for all indicators (latest and previous rows)"""
+    db = ThreadSession()
     try:
-        latest_daily = db.query(DailyMetric).order_by(
-            DailyMetric.date.desc()
-        ).first()
-
-        if latest_daily:
-            prev_daily = db.query(DailyMetric).filter(
-                DailyMetric.date < latest_daily.date
-            ).order_by(DailyMetric.date.desc()).first()
-        else:
-            prev_daily = None
-
-        latest_macro = db.query(MacroMetric).order_by(
-            MacroMetric.month.desc()
-        ).first()
-
-        if latest_macro:
-            prev_macro = db.query(MacroMetric).filter(
-                MacroMetric.month < latest_macro.month
-            ).order_by(MacroMetric.month.desc()).first()
-        else:
-            prev_macro = None
+        daily = latest_metrics(db, DailyMetric, DAILY_KPI_COLUMNS)
+        macro = latest_metrics(db, MacroMetric, MACRO_KPI_COLUMNS)
 
         return {
-            'daily': latest_daily,
-            'daily_prev': prev_daily,
-            'macro': latest_macro,
-            'macro_prev': prev_macro
+            'daily': daily[0] if daily else None,
+            'daily_prev': daily[1] if len(daily) > 1 else None,
+            'macro': macro[0] if macro else None,
+            'macro_prev': macro[1] if len(macro) > 1 else None
         }
     finally:
-        db.close()
+        ThreadSession.remove()
 
 
 @st.cache_data(ttl=300)
 def get_trend_data(days=30):
     """Get recent trend data for sparklines"""
-    db = SessionLocal()
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+
+    snapshot = load_snapshot('daily_metrics', columns=list(DAILY_TREND_COLUMNS))
+    if snapshot is not None:
+        return snapshot_frame(snapshot, DailyMetric, DAILY_TREND_COLUMNS, start=cutoff)
+
+    db = ThreadSession()
     try:
-        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
-
-        daily_metrics = db.query(DailyMetric).filter(
-            DailyMetric.date >= cutoff
-        ).order_by(DailyMetric.date).all()
-
-        return pd.DataFrame([{
-            'date': m.date,
-            'diesel': m.diesel_usd_per_gal,
-            'gas_price': m.gas_price,
-            'oil_price': m.oil_price
-        } for m in daily_metrics])
+        return metrics_frame(db, DailyMetric, DAILY_TREND_COLUMNS, start=cutoff)
     finally:
-        db.close()
+        ThreadSession.remove()
 
 
 @st.cache_data(ttl=300)
 def get_macro_trend_data(months=6):
     """Get recent macro trend data"""
-    db = SessionLocal()
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=months*30)).strftime('%Y-%m')
+
+    snapshot = load_snapshot('macro_metrics', columns=list(MACRO_TREND_COLUMNS))
+    if snapshot is not None:
+        return snapshot_frame(snapshot, MacroMetric, MACRO_TREND_COLUMNS, start=cutoff)
+
+    db = ThreadSession()
     try:
-        cutoff = (datetime.now(timezone.utc) - timedelta(days=months*30)).strftime('%Y-%m')
-
-        macro_metrics = db.query(MacroMetric).filter(
-            MacroMetric.month >= cutoff
-        ).order_by(MacroMetric.month).all()
-
-        return pd.DataFrame([{
-            'month': m.month,
-            'cass_shipments': m.cass_shipments_index,
-            'cass_expenditures': m.cass_expenditures_index,
-            'ata_tonnage': m.ata_tonnage_index,
-            'industrial_production': m.industrial_production,
-            'ism_pmi': m.ism_pmi
-        } for m in macro_metrics])
+        return metrics_frame(db, MacroMetric, MACRO_TREND_COLUMNS, start=cutoff)
     finally:
-        db.close()
+        ThreadSession.remove()
 
 
 @st.cache_data(ttl=300)
 def get_recent_news(limit=5):
     """Get most recent high-importance news"""
-    db = SessionLocal()
+    db = ThreadSession()
     try:
-        articles = db.query(NewsArticle).filter(
-            NewsArticle.importance >= 3
-        ).order_by(NewsArticle.published_at.desc()).limit(limit).all()
-
-        return articles
+        return recent_news(db, min_importance=3, limit=limit)
     finally:
-        db.close()
+        ThreadSession.remove()
 
 
 @st.cache_data(ttl=600)
 def get_state_freight_data():
     """Aggregate freight activity by state"""
-    db = SessionLocal()
+    db = ThreadSession()
     try:
         from sqlalchemy import func
 
@@ -239,7 +240,7 @@ def get_state_freight_data():
         return df
 
     finally:
-        db.close()
+        ThreadSession.remove()
 
 
 def create_choropleth_map(state_data, metric='total', title='Freight Activity by State'):
@@ -416,7 +417,7 @@ def create_sparkline(data, column):
 metrics = get_latest_metrics()
 trend_data = get_trend_data(days=30)
 macro_trend_data = get_macro_trend_data(months=6)
-recent_news = get_recent_news(limit=5)
+news_items = get_recent_news(limit=5)
 
 # Check if we have data
 if not metrics['daily'] and not metrics['macro']:
@@ -568,8 +569,8 @@ with col1:
 with col2:
     st.markdown("**Latest News**")
 
-    if recent_news:
-        for article in recent_news[:3]:
+    if news_items:
+        for article in news_items[:3]:
             importance_label = "HIGH" if article.importance >= 4 else "MED"
             st.markdown(f'<div style="font-size: 0.8rem; padding: 0.2rem 0; margin-bottom: 0.2rem;"><b>[{importance_label}]</b> '
                        f'<a href="{article.url}" target="_blank">{article.title[:50]}...</a><br>'
@@ -8,11 +8,15 @@ import pandas as pd
 from datetime import datetime, timedelta, timezone
 import sys
 import os
+from sqlalchemy import select
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from lib.database import SessionLocal, NewsArticle
-from lib.utils import get_all_tags_from_db, format_date
+from lib.database import ThreadSession, NewsArticle, ArticleTag, refresh_article_tags, tag_facets
+from lib.utils import format_date
+from lib.search import to_fts_query, match_news, highlight_snippet
+from lib.article_bodies import load_article_body
+from lib.read_model import news_select, news_source_counts
 
 st.set_page_config(
     page_title="News Intelligence - Freight Intelligence",
@@ -104,42 +108,39 @@ st.markdown("""
 
 @st.cache_data(ttl=300)
 def load_news(sources=None, days_back=7, min_importance=1, search_query="", selected_tags=None):
-    """Load and filter news articles"""
-    db = SessionLocal()
+    """Load and filter news articles as row tuples (full-text search results ranked by relevance)"""
+    db = ThreadSession()
 
     try:
-        query = db.query(NewsArticle)
+        query = news_select()
 
         if sources:
-            query = query.filter(NewsArticle.source.in_(sources))
+            query = query.where(NewsArticle.source.in_(sources))
 
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_back)
-        query = query.filter(NewsArticle.published_at >= cutoff_date)
+        query = query.where(NewsArticle.published_at >= cutoff_date)
 
-        query = query.filter(NewsArticle.importance >= min_importance)
-
-        if search_query:
-            search_pattern = f"%{search_query}%"
-            query = query.filter(
-                (NewsArticle.title.like(search_pattern)) |
-                (NewsArticle.summary.like(search_pattern))
-            )
+        query = query.where(NewsArticle.importance >= min_importance)
 
         if selected_tags:
+            # Article must carry every selected tag (exact match via the tag index)
             for tag in selected_tags:
-                query = query.filter(NewsArticle.tags.like(f"%{tag}%"))
+                tagged = select(ArticleTag.article_id).where(ArticleTag.tag == tag)
+                query = query.where(NewsArticle.id.in_(tagged))
 
-        articles = query.order_by(NewsArticle.published_at.desc()).all()
+        if to_fts_query(search_query):
+            # Rows gain a 'snippet' field
+            return db.execute(match_news(query, search_query)).all()
 
-        return articles
+        return db.execute(query.order_by(NewsArticle.published_at.desc())).all()
 
     finally:
-        db.close()
+        ThreadSession.remove()
 
 
 def update_article(article_id, importance, tags, notes):
     """Update article metadata"""
-    db = SessionLocal()
+    db = ThreadSession()
     try:
         article = db.query(NewsArticle).filter_by(id=article_id).first()
         if article:
@@ -147,47 +148,53 @@ def update_article(article_id, importance, tags, notes):
             article.tags = tags
             article.notes = notes
             article.updated_at = datetime.now(timezone.utc)
+            db.flush()
+            refresh_article_tags(db, [article_id])
             db.commit()
     finally:
-        db.close()
+        ThreadSession.remove()
 
 
 def mark_as_read(article_id):
     """Mark article as read"""
-    db = SessionLocal()
+    db = ThreadSession()
     try:
         article = db.query(NewsArticle).filter_by(id=article_id).first()
         if article:
             article.read = True
             db.commit()
     finally:
-        db.close()
+        ThreadSession.remove()
+
+
+@st.cache_data(ttl=3600, max_entries=50)
+def get_article_body(article_id):
+    """Decompressed full text of one article (loaded only when asked for)"""
+    db = ThreadSession()
+    try:
+        return load_article_body(db, article_id)
+    finally:
+        ThreadSession.remove()
 
 
 @st.cache_data(ttl=600)
 def get_available_sources():
     """Get list of sources with article counts"""
-    db = SessionLocal()
+    db = ThreadSession()
     try:
-        from sqlalchemy import func
-        results = db.query(
-            NewsArticle.source,
-            func.count(NewsArticle.id).label('count')
-        ).group_by(NewsArticle.source).all()
-
-        return {source: count for source, count in results}
+        return news_source_counts(db)
     finally:
-        db.close()
+        ThreadSession.remove()
 
 
 @st.cache_data(ttl=600)
 def get_all_tags():
-    """Get all unique tags"""
-    db = SessionLocal()
+    """Get tags with article counts, most used first"""
+    db = ThreadSession()
     try:
-        return get_all_tags_from_db(db)
+        return dict(tag_facets(db))
     finally:
-        db.close()
+        ThreadSession.remove()
 
 
 def display_article_compact(article):
@@ -212,10 +219,13 @@ def display_article_compact(article):
         tags_list = [t.strip() for t in article.tags.split(',')]
         tags_html = " ".join([f'<span class="tag-badge">{tag}</span>' for tag in tags_list[:5]])
 
-    # Summary (escape HTML)
+    # Summary (escape HTML), or the highlighted match when searching
+    import html
     summary_text = ""
-    if article.summary:
-        import html
+    snippet = getattr(article, 'snippet', None)
+    if snippet:
+        summary_text = f'<div style="font-size: 0.85rem; margin-top: 0.25rem; color: #cbd5e1;">{highlight_snippet(snippet)}</div>'
+    elif article.summary:
         summary_text = f'<div style="font-size: 0.85rem; margin-top: 0.25rem; color: #cbd5e1;">{html.escape(article.summary[:150])}...</div>'
 
     # Build HTML
@@ -248,10 +258,18 @@ def display_article_full(article):
         col1, col2 = st.columns([3, 1])
 
         with col1:
+            snippet = getattr(article, 'snippet', None)
+            if snippet:
+                st.caption("Match")
+                st.markdown(highlight_snippet(snippet), unsafe_allow_html=True)
+
             if article.summary:
                 st.caption("Summary")
                 st.write(article.summary)
 
+            if st.toggle("Full text", key=f"body_{article.id}"):
+                st.write(get_article_body(article.id) or "_Full text not available_")
+
             if article.tags:
                 tags_list = [t.strip() for t in article.tags.split(',')]
                 tag_badges = " ".join([f"`{tag}`" for tag in tags_list])
@@ -336,7 +354,8 @@ with col3:
     if all_tags:
         selected_tags = st.multiselect(
             "Tags",
-            all_tags,
+            list(all_tags),
+            format_func=lambda tag: f"{tag} ({all_tags[tag]})",
             label_visibility="visible"
         )
     else:
@@ -15,7 +15,12 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from lib.database import SessionLocal, DailyMetric, MacroMetric
+from lib.database import ThreadSession, DailyMetric, MacroMetric
+from lib.read_model import (
+    DIESEL_ROLLUP_COLUMNS, diesel_rollup_frame, diesel_rollup_snapshot_frame, metrics_frame, snapshot_frame
+)
+from lib import analytics
+from lib.snapshots import load_snapshot
 
 st.set_page_config(
     page_title="Historical Analysis - Freight Intelligence",
@@ -66,65 +71,104 @@ st.markdown("""
 
 # === FUNCTIONS ===
 
+# Model/snapshot column -> DataFrame column
+DAILY_COLUMNS = {
+    'date': 'date',
+    'diesel_usd_per_gal': 'diesel',
+    'gas_price': 'gas_price',
+    'oil_price': 'oil_price',
+    'van_spot_index': 'van_rate',
+    'reefer_spot_index': 'reefer_rate',
+    'flatbed_spot_index': 'flatbed_rate'
+}
+
+MACRO_COLUMNS = {
+    'month': 'month',
+    'cass_shipments_index': 'cass_shipments',
+    'cass_expenditures_index': 'cass_expenditures',
+    'ata_tonnage_index': 'ata_tonnage',
+    'industrial_production': 'industrial_production',
+    'ism_pmi': 'ism_pmi',
+    'retail_sales': 'retail_sales',
+    'consumer_sentiment': 'consumer_sentiment'
+}
+
+# Regions of the regional diesel chart (EIA area codes)
+PADD_REGIONS = {
+    'NUS': 'U.S.',
+    'R10': 'East Coast (PADD 1)',
+    'R20': 'Midwest (PADD 2)',
+    'R30': 'Gulf Coast (PADD 3)',
+    'R40': 'Rocky Mountain (PADD 4)',
+    'R50': 'West Coast (PADD 5)',
+}
+
+# History shown per rollup grain (days; None = everything)
+REGIONAL_LOOKBACK_DAYS = {'month': 5 * 365, 'year': None}
+
+
+def non_empty(df):
+    """Key columns already arrive as datetime64; empty results become an empty DataFrame"""
+    return pd.DataFrame() if df.empty else df
+
+
 @st.cache_data(ttl=600)
 def load_daily_metrics(days_back=365):
-    """Load daily metrics"""
-    db = SessionLocal()
+    """Load daily metrics (DuckDB when installed, else columnar snapshot when fresh, else SQLite)"""
+    cutoff_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+
+    df = analytics.metrics_frame('daily_metrics', DAILY_COLUMNS, start=cutoff_date)
+    if df is not None:
+        return non_empty(df)
+
+    snapshot = load_snapshot('daily_metrics', columns=list(DAILY_COLUMNS))
+    if snapshot is not None:
+        return non_empty(snapshot_frame(snapshot, DailyMetric, DAILY_COLUMNS, start=cutoff_date))
+
+    db = ThreadSession()
     try:
-        cutoff_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
-        metrics = db.query(DailyMetric).filter(
-            DailyMetric.date >= cutoff_date
-        ).order_by(DailyMetric.date).all()
-
-        if not metrics:
-            return pd.DataFrame()
-
-        data = [{
-            'date': m.date,
-            'diesel': m.diesel_usd_per_gal,
-            'gas_price': m.gas_price,
-            'oil_price': m.oil_price,
-            'van_rate': m.van_spot_index,
-            'reefer_rate': m.reefer_spot_index,
-            'flatbed_rate': m.flatbed_spot_index
-        } for m in metrics]
-
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['date'])
-        return df
+        df = metrics_frame(db, DailyMetric, DAILY_COLUMNS, start=cutoff_date)
+        return non_empty(df)
     finally:
-        db.close()
+        ThreadSession.remove()
 
 
 @st.cache_data(ttl=600)
 def load_macro_metrics(months_back=24):
-    """Load macro metrics"""
-    db = SessionLocal()
+    """Load macro metrics (DuckDB when installed, else columnar snapshot when fresh, else SQLite)"""
+    cutoff_month = (datetime.now() - timedelta(days=months_back*30)).strftime('%Y-%m')
+
+    df = analytics.metrics_frame('macro_metrics', MACRO_COLUMNS, start=cutoff_month)
+    if df is not None:
+        return non_empty(df)
+
+    snapshot = load_snapshot('macro_metrics', columns=list(MACRO_COLUMNS))
+    if snapshot is not None:
+        return non_empty(snapshot_frame(snapshot, MacroMetric, MACRO_COLUMNS, start=cutoff_month))
+
+    db = ThreadSession()
+    try:
+        df = metrics_frame(db, MacroMetric, MACRO_COLUMNS, start=cutoff_month)
+        return non_empty(df)
+    finally:
+        ThreadSession.remove()
+
+
+@st.cache_data(ttl=600)
+def load_regional_diesel(grain='week', days_back=365):
+    """Regional diesel rollups (columnar snapshot when fresh, else SQLite)"""
+    cutoff_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d') if days_back else None
+    regions = list(PADD_REGIONS)
+
+    snapshot = load_snapshot('diesel_price_rollups', columns=['grain'] + DIESEL_ROLLUP_COLUMNS)
+    if snapshot is not None:
+        return diesel_rollup_snapshot_frame(snapshot, grain, start=cutoff_date, regions=regions)
+
+    db = ThreadSession()
     try:
-        cutoff_month = (datetime.now() - timedelta(days=months_back*30)).strftime('%Y-%m')
-        metrics = db.query(MacroMetric).filter(
-            MacroMetric.month >= cutoff_month
-        ).order_by(MacroMetric.month).all()
-
-        if not metrics:
-            return pd.DataFrame()
-
-        data = [{
-            'month': m.month,
-            'cass_shipments': m.cass_shipments_index,
-            'cass_expenditures': m.cass_expenditures_index,
-            'ata_tonnage': m.ata_tonnage_index,
-            'industrial_production': m.industrial_production,
-            'ism_pmi': m.ism_pmi,
-            'retail_sales': m.retail_sales,
-            'consumer_sentiment': m.consumer_sentiment
-        } for m in metrics]
-
-        df = pd.DataFrame(data)
-        df['month'] = pd.to_datetime(df['month'])
-        return df
+        return diesel_rollup_frame(db, grain, start=cutoff_date, regions=regions)
     finally:
-        db.close()
+        ThreadSession.remove()
 
 
 def calculate_trend(series):
@@ -358,3 +402,60 @@ if available_daily or available_macro:
 
 else:
     st.info("Select metrics above to display trends")
+
+# === REGIONAL DIESEL ===
+st.markdown("---")
+col1, col2, col3 = st.columns([1, 1, 4])
+
+with col1:
+    grain = st.selectbox("Regional diesel", ['week', 'month', 'year'], format_func=str.title)
+
+with col2:
+    regional_view = st.selectbox("Show", ["Price", "Spread vs U.S."])
+
+regional_df = load_regional_diesel(grain=grain, days_back=REGIONAL_LOOKBACK_DAYS.get(grain, days_back))
+
+if len(regional_df) > 0:
+    value_column = 'avg_price' if regional_view == "Price" else 'spread_vs_nus'
+    fig = go.Figure()
+
+    for region_code, region_name in PADD_REGIONS.items():
+        if value_column == 'spread_vs_nus' and region_code == 'NUS':
+            continue
+        region_df = regional_df[regional_df['region_code'] == region_code]
+        if region_df[value_column].notna().any():
+            fig.add_trace(go.Scatter(
+                x=region_df['period'],
+                y=region_df[value_column],
+                name=region_name,
+                mode='lines',
+                line=dict(width=2, dash='dash' if region_code == 'NUS' else 'solid')
+            ))
+
+    fig.update_layout(
+        template='plotly_dark',
+        height=350,
+        margin=dict(l=50, r=50, t=30, b=50),
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="top", y=-0.15, xanchor="center", x=0.5, font=dict(size=10)),
+        yaxis_title="$/gal" if value_column == 'avg_price' else "$/gal vs U.S. average",
+        font=dict(size=11)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Latest period: average price per region, delta = spread vs the U.S. average
+    latest = regional_df[regional_df['period'] == regional_df['period'].max()].set_index('region_code')
+    cols = st.columns(len(PADD_REGIONS))
+    for idx, (region_code, region_name) in enumerate(PADD_REGIONS.items()):
+        if region_code in latest.index:
+            with cols[idx]:
+                row = latest.loc[region_code]
+                spread = row['spread_vs_nus']
+                st.metric(
+                    label=region_name,
+                    value=f"${row['avg_price']:.2f}",
+                    delta=f"{spread:+.2f} vs U.S." if region_code != 'NUS' and pd.notna(spread) else None,
+                    delta_color="inverse"
+                )
+else:
+    st.info("No regional diesel prices yet. Run the EIA diesel scraper to collect them.")
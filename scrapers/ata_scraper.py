@@ -4,6 +4,7 @@ Scrapes monthly ATA Truck Tonnage Index from press releases
 Source: https://www.trucking.org/economics-and-industry-data
 """
 
+import asyncio
 import re
 from datetime import datetime
 from dateutil import parser as date_parser
@@ -12,45 +13,60 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scrapers.base_scraper import BaseScraper
-from lib.database import SessionLocal, MacroMetric
+from scrapers.base_scraper import AsyncBaseScraper
+from lib.database import SessionLocal, upsert_series, upsert_observations
+from lib.dates import to_epoch_day
 
 
-class ATAScraper(BaseScraper):
+class ATAScraper(AsyncBaseScraper):
     """Scrape ATA Truck Tonnage Index from press releases"""
 
+    STORE_TABLES = ('series', 'observations')
+
     BASE_URL = "https://www.trucking.org/economics-and-industry-data"
 
+    # Observation series written by this scraper
+    SERIES = {
+        'ATA_TONNAGE': {'name': 'ATA Truck Tonnage Index', 'frequency': 'monthly'},
+    }
+
+    # Parsed field -> series id
+    FIELD_SERIES = {
+        'ata_tonnage_index': 'ATA_TONNAGE',
+    }
+
     def __init__(self):
         super().__init__('ata_scraper')
 
-    def fetch(self):
-        """Fetch ATA Index page"""
+    async def fetch(self):
+        """Fetch the ATA Index page and its recent press releases (concurrently)"""
         self.logger.info(f"Fetching from {self.BASE_URL}")
-        response = self.get(self.BASE_URL)
+        response = await self.conditional_aget(self.BASE_URL)
         response.raise_for_status()
-        return response.text
 
-    def parse(self, html):
-        """Parse ATA Tonnage Index from HTML"""
-        soup = self.soup(html)
-        metrics = []
+        links = self._press_release_links(self.soup(response.text))[:12]  # Last 12 months
+        pages = await asyncio.gather(*(self._fetch_press_release(link) for link in links))
 
-        # ATA publishes monthly press releases with tonnage index
-        # Look for text patterns with index values
-        text_content = soup.get_text()
+        return {
+            'html': response.text,
+            'press_releases': [(link, text) for link, text in zip(links, pages) if text is not None]
+        }
 
-        # Common patterns in ATA releases:
-        # "The index increased/decreased to 123.4 in January"
-        # "January 2024: 123.4"
-        # "Tonnage Index: 123.4"
-
-        # Try to find all press release links or index mentions
-        links = soup.find_all('a', href=True)
+    async def _fetch_press_release(self, link):
+        """HTML of one press release, or None if it could not be fetched"""
+        try:
+            self.logger.info(f"  Fetching press release: {link}")
+            response = await self.aget(link)
+            return response.text
+        except Exception as e:
+            self.logger.warning(f"  Could not fetch press release {link}: {e}")
+            return None
 
-        # Look for recent press release links
+    def _press_release_links(self, soup):
+        """Absolute URLs of tonnage press releases linked from the index page"""
+        # ATA publishes monthly press releases with tonnage index
         press_release_links = []
-        for link in links:
+        for link in soup.find_all('a', href=True):
             href = link.get('href', '')
             text = link.get_text().lower()
             if 'tonnage' in text or 'truck tonnage index' in href.lower():
@@ -58,14 +74,21 @@ class ATAScraper(BaseScraper):
                     press_release_links.append(href)
                 elif href.startswith('/'):
                     press_release_links.append(f"https://www.trucking.org{href}")
+        return press_release_links
 
-        # Fetch and parse recent press releases
-        for pr_link in press_release_links[:12]:  # Last 12 months
+    def parse(self, raw_data):
+        """Parse ATA Tonnage Index from the press releases (or the index page as fallback)"""
+        soup = self.soup(raw_data['html'])
+        metrics = []
+
+        # Common patterns in ATA releases:
+        # "The index increased/decreased to 123.4 in January"
+        # "January 2024: 123.4"
+        # "Tonnage Index: 123.4"
+
+        for pr_link, pr_html in raw_data['press_releases']:
             try:
-                self.logger.info(f"  Fetching press release: {pr_link}")
-                pr_response = self.get(pr_link)
-                pr_soup = self.soup(pr_response.text)
-                pr_text = pr_soup.get_text()
+                pr_text = self.soup(pr_html).get_text()
 
                 # Extract index value and month
                 index_value = self._extract_index_value(pr_text)
@@ -121,36 +144,29 @@ class ATAScraper(BaseScraper):
     def store(self, metrics):
         """Store ATA metrics in database"""
         db = SessionLocal()
-        stored_count = 0
 
         try:
+            observations = []
             for metric_data in metrics:
                 if metric_data.get('_note'):
                     self.logger.warning(f"Skipping placeholder: {metric_data['_note']}")
                     continue
 
-                # Get or create record for this month
-                existing = db.query(MacroMetric).filter_by(month=metric_data['month']).first()
-
-                if existing:
-                    # Update existing record
-                    if metric_data.get('ata_tonnage_index'):
-                        existing.ata_tonnage_index = metric_data['ata_tonnage_index']
-                    existing.source = 'ATA'
-                    existing.confidence = 1.0
-                else:
-                    # Create new record
-                    new_metric = MacroMetric(
-                        month=metric_data['month'],
-                        ata_tonnage_index=metric_data.get('ata_tonnage_index'),
-                        source='ATA',
-                        confidence=1.0
-                    )
-                    db.add(new_metric)
-                    stored_count += 1
+                # Only store index values we actually parsed
+                for field, series_id in self.FIELD_SERIES.items():
+                    if metric_data.get(field):
+                        observations.append({
+                            'series_id': series_id,
+                            'period': to_epoch_day(metric_data['month']),  # First of the month
+                            'value': metric_data[field],
+                            'source': 'ATA'
+                        })
+
+            upsert_series(db, 'ATA', self.SERIES)
+            stored_count = upsert_observations(db, observations)
 
             db.commit()
-            self.logger.info(f"Stored/updated {stored_count} ATA metrics")
+            self.logger.info(f"Stored/updated {stored_count} ATA observations")
 
         except Exception as e:
             db.rollback()
@@ -4,11 +4,18 @@ Provides common functionality for all scrapers with retry logic and error handli
 """
 
 from abc import ABC, abstractmethod
+from contextlib import ExitStack, contextmanager, nullcontext
+import asyncio
+import contextvars
+import httpx
 import requests
 from bs4 import BeautifulSoup
+import random
+import threading
 import time
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
 from sqlalchemy.orm import Session
 import sys
 import os
@@ -16,7 +23,20 @@ import os
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from lib.database import SessionLocal, ScraperRun
+from scrapers.circuit_breaker import CircuitOpen, circuit_breaker
+from scrapers.http_client import httpx_limits, mount_shared_adapter, record_request, throttle_delay
+from scrapers.http_fixtures import fixture_transport, replaying
+from lib.database import (
+    IS_POSTGRES, SessionLocal, ScraperRun, count_upserts, load_http_validators, resume_checkpoint,
+    save_http_validators, save_run_phases
+)
+
+# resource is Unix-only - without it peak RSS is not recorded
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(
@@ -24,21 +44,165 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+}
+REQUEST_TIMEOUT = 30
+
+# Async engine limits (override via .env): connections in the shared pool, in-flight requests per host
+# (request rates are capped separately per host, see scrapers.http_client)
+HTTP_MAX_CONNECTIONS = int(os.getenv("SCRAPER_MAX_CONNECTIONS", "20"))
+HTTP_HOST_CONCURRENCY = int(os.getenv("SCRAPER_HOST_CONCURRENCY", "8"))
+
+# Pages an async streaming scraper downloads ahead of the batch being stored
+STREAM_QUEUE_PAGES = int(os.getenv("SCRAPER_STREAM_QUEUE_PAGES", "2"))
+
+# Hosts that get a lower limit than HTTP_HOST_CONCURRENCY (HTML sites rather than APIs)
+HOST_CONCURRENCY = {
+    'www.trucking.org': 2,
+    'www.cassinfo.com': 2,
+    'www.eia.gov': 2,
+}
+
+# Request retries (override via .env): attempts after the first, base and maximum backoff in seconds
+REQUEST_RETRIES = int(os.getenv("SCRAPER_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("SCRAPER_RETRY_DELAY", "5"))
+RETRY_MAX_DELAY = float(os.getenv("SCRAPER_RETRY_MAX_DELAY", "120"))
+
+# Responses worth retrying (rate limited or a transient server error)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Incremental scrapers re-request this many days before their newest stored period,
+# so values the source revised since the last run are picked up
+REVISION_LOOKBACK_DAYS = int(os.getenv("SCRAPER_REVISION_LOOKBACK_DAYS", "180"))
+
+# Classify upserted rows as inserted/updated/unchanged in scraper_run_phases (SCRAPER_COUNT_ROWS=1).
+# Off by default: counting costs an extra key lookup query per upsert batch, so enable it for profiling runs
+COUNT_ROWS = os.getenv("SCRAPER_COUNT_ROWS", "0") == "1"
+
+# Instrumented phases of run(), persisted per run in scraper_run_phases
+PHASES = ('fetch', 'parse', 'store_wait', 'store')
+
+# Store phases of scrapers running in parallel (run_all_scrapers) hold a lock per
+# table they write. SQLite allows a single writer per database, so there every
+# store takes the same lock; PostgreSQL only serializes stores sharing a table.
+DATABASE_LOCK = 'database'
+_store_locks = {}
+_store_locks_guard = threading.Lock()
+
+
+def acquire_store_locks(tables) -> ExitStack:
+    """
+    Block until the write locks for tables are held; close the returned stack to release them
+    Locks are taken in sorted order, so parallel stores cannot deadlock.
+    """
+    keys = sorted(set(tables)) if IS_POSTGRES else [DATABASE_LOCK]
+    with _store_locks_guard:
+        locks = [_store_locks.setdefault(key, threading.Lock()) for key in keys]
+
+    stack = ExitStack()
+    for lock in locks:
+        stack.enter_context(lock)
+    return stack
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of the process so far in MB (None where unavailable)
+    Process-wide: with scrapers running in parallel it covers all of them.
+    """
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KB elsewhere
+
+
+# Phase (see PHASES) the current thread/task is in; requests are counted in its stats
+_current_phase = contextvars.ContextVar('scraper_phase', default=None)
+
+
+def _empty_phase_stats() -> dict:
+    rows = 0 if COUNT_ROWS else None  # NULL: not counted
+    return {
+        'requests': 0, 'bytes_downloaded': 0, 'retries': 0,
+        'rows_inserted': rows, 'rows_updated': rows, 'rows_unchanged': rows, 'peak_rss_mb': None
+    }
+
+
+def retry_after_seconds(headers):
+    """Seconds requested by a Retry-After header (delta-seconds or HTTP-date), or None"""
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(when.tzinfo)).total_seconds())
+
+
+def backoff_delay(attempt: int, retry_after: float = None, base: float = RETRY_BASE_DELAY) -> float:
+    """
+    Seconds before retry number attempt + 1: Retry-After when the server sent one,
+    otherwise exponential backoff with full jitter (uniform 0..base * 2^attempt), capped
+    """
+    if retry_after is not None:
+        return min(retry_after, RETRY_MAX_DELAY)
+    return random.uniform(0, min(RETRY_MAX_DELAY, base * 2 ** attempt))
+
+
+class NotModified(Exception):
+    """Raised by conditional requests when the source answers 304; run() then skips parse and store"""
+
 
 class BaseScraper(ABC):
     """Base class for all scrapers"""
 
-    def __init__(self, scraper_name: str, max_retries: int = 3, retry_delay: int = 5):
+    # Tables store() writes (scraper_runs excluded); parallel stores sharing a table are serialized
+    STORE_TABLES = ()
+
+    # Opt-in streaming: fetch() yields (checkpoint, page) pairs, parse() turns one page
+    # into a batch and store() commits it, so memory stays bounded by a few pages and rows
+    # land before the download ends (async scrapers keep downloading the next pages while
+    # a batch is parsed and stored in a worker thread). After each batch the checkpoint
+    # (a string) is committed on the scraper_runs row; a retry, or the next run after
+    # a failed/interrupted one, finds it in self.resume_from and skips what is stored.
+    STREAMING = False
+
+    def __init__(self, scraper_name: str, max_retries: int = 3, retry_delay: int = 5,
+                 full_backfill: bool = False):
         self.scraper_name = scraper_name
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.full_backfill = full_backfill  # Ignore high watermarks and request the full history
         self.logger = logging.getLogger(scraper_name)
 
+        # Validators of responses fetched by the current attempt, saved once store() succeeded
+        self._pending_validators = {}
+
+        # Status of the last run() ('success', 'unchanged' or 'failed')
+        self.last_status = None
+
+        # Requests retried during the last run()
+        self.retries = 0
+
+        # Seconds per phase of the last run() (summed over attempts); 'store_wait' is time spent waiting for store locks
+        self.timings = {}
+
+        # Requests, bytes, retries, rows written and peak RSS per phase of the last run() (see _timed)
+        self.phase_stats = {}
+
+        # Streaming scrapers: checkpoint of the last stored batch to continue after (None = from the start)
+        self.resume_from = None
+
         # Setup HTTP session
         self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+        self.session.headers.update(DEFAULT_HEADERS)
+        mount_shared_adapter(self.session)  # Process-wide pools, record/replay (see scrapers.http_client)
 
     @abstractmethod
     def fetch(self):
@@ -58,8 +222,17 @@ class BaseScraper(ABC):
     def run(self) -> bool:
         """
         Main execution method with retry logic and error tracking
-        Returns True if successful, False otherwise
+        A failed attempt only repeats what did not complete: after a failed store()
+        the parsed data is stored again, nothing is refetched; streaming scrapers
+        resume after their last committed batch. Individual requests are retried
+        on their own (see get/post). Returns True if successful, False otherwise
         """
+        self.timings = {phase: 0.0 for phase in PHASES}
+        self.phase_stats = {phase: _empty_phase_stats() for phase in PHASES}
+        self.retries = 0
+        attempts = 0
+        run_started = time.perf_counter()
+
         db = SessionLocal()
         scraper_run = ScraperRun(
             scraper_name=self.scraper_name,
@@ -69,57 +242,450 @@ class BaseScraper(ABC):
         db.add(scraper_run)
         db.commit()
 
+        raw_data = parsed_data = None
+        fetched = parsed = False
+        if self.STREAMING:
+            # A full backfill requests different pages than the run that left the checkpoint
+            self.resume_from = None if self.full_backfill else resume_checkpoint(db, self.scraper_name, scraper_run.id)
+            if self.resume_from:
+                self.logger.info(f"[{self.scraper_name}] Resuming after checkpoint {self.resume_from}")
+
         try:
             for attempt in range(self.max_retries):
+                attempts = attempt + 1
                 try:
                     self.logger.info(f"[{self.scraper_name}] Starting (attempt {attempt + 1}/{self.max_retries})")
 
-                    # Execute scraping pipeline
-                    raw_data = self.fetch()
-                    self.logger.info(f"[{self.scraper_name}] Fetch complete")
+                    if self.STREAMING:
+                        self._stream(db, scraper_run)
+                        self.logger.info(f"[{self.scraper_name}] Stream complete: {scraper_run.batches_stored} batches")
+                    else:
+                        # Execute scraping pipeline, skipping phases an earlier attempt completed
+                        if not fetched:
+                            self._pending_validators = {}
+                            with self._timed('fetch'):
+                                raw_data = self._fetch()
+                            fetched = True
+                            self.logger.info(f"[{self.scraper_name}] Fetch complete")
 
-                    parsed_data = self.parse(raw_data)
-                    self.logger.info(f"[{self.scraper_name}] Parse complete: {len(parsed_data)} records")
+                        if not parsed:
+                            with self._timed('parse'):
+                                parsed_data = self.parse(raw_data)
+                            parsed = True
+                            self.logger.info(f"[{self.scraper_name}] Parse complete: {len(parsed_data)} records")
 
-                    self.store(parsed_data)
-                    self.logger.info(f"[{self.scraper_name}] Store complete")
+                        with self._timed('store_wait'):
+                            locks = acquire_store_locks(self.STORE_TABLES)
+                        with locks, self._timed('store'):
+                            self.store(parsed_data)
+                        scraper_run.records_scraped = len(parsed_data)
+                        self.logger.info(f"[{self.scraper_name}] Store complete")
 
-                    # Mark as successful
+                    # Mark as successful; conditional requests only skip data that is now stored
+                    if self._pending_validators:
+                        save_http_validators(db, self._pending_validators)
                     scraper_run.completed_at = datetime.utcnow()
-                    scraper_run.status = 'success'
-                    scraper_run.records_scraped = len(parsed_data)
+                    scraper_run.status = self.last_status = 'success'
                     db.commit()
 
-                    self.logger.info(f"✅ [{self.scraper_name}] Success! Scraped {len(parsed_data)} records")
+                    self.logger.info(f"✅ [{self.scraper_name}] Success! Scraped {scraper_run.records_scraped} records")
+                    return True
+
+                except NotModified:
+                    scraper_run.completed_at = datetime.utcnow()
+                    scraper_run.status = self.last_status = 'unchanged'
+                    db.commit()
+
+                    self.logger.info(f"✅ [{self.scraper_name}] Source not modified - nothing to parse or store")
                     return True
 
                 except Exception as e:
                     self.logger.error(f"❌ [{self.scraper_name}] Error on attempt {attempt + 1}: {e}")
 
-                    if attempt < self.max_retries - 1:
-                        self.logger.info(f"⏳ Retrying in {self.retry_delay} seconds...")
-                        time.sleep(self.retry_delay)
+                    if not parsed:
+                        fetched = False  # A response that does not parse may be truncated - fetch it again
+
+                    # An open circuit breaker will not close within this run's backoff
+                    if attempt < self.max_retries - 1 and not isinstance(e, CircuitOpen):
+                        delay = backoff_delay(attempt, base=self.retry_delay)
+                        phase = 'store' if parsed else 'fetch'
+                        if self.resume_from:
+                            phase = f"checkpoint {self.resume_from}"
+                        self.logger.info(f"⏳ Retrying from {phase} in {delay:.1f} seconds...")
+                        time.sleep(delay)
                     else:
                         # Final attempt failed
                         scraper_run.completed_at = datetime.utcnow()
-                        scraper_run.status = 'failed'
+                        scraper_run.status = self.last_status = 'failed'
                         scraper_run.error_message = str(e)
                         db.commit()
 
-                        self.logger.error(f"💀 [{self.scraper_name}] Failed after {self.max_retries} attempts")
+                        self.logger.error(f"💀 [{self.scraper_name}] Failed after {attempt + 1} attempts")
                         return False
 
+        finally:
+            self.timings['total'] = time.perf_counter() - run_started
+            self._save_instrumentation(db, scraper_run, attempts)
+            db.close()
+
+    def _save_instrumentation(self, db: Session, scraper_run: ScraperRun, attempts: int) -> None:
+        """Persist the attempt count and per-phase stats of this run; never fails the run"""
+        try:
+            scraper_run.attempts = attempts
+            phases = {phase: {'seconds': self.timings[phase], **self.phase_stats[phase]} for phase in PHASES}
+            save_run_phases(db, scraper_run.id, phases)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self.logger.warning(f"Could not save run instrumentation: {e}")
+
+    def _stream(self, db: Session, scraper_run: ScraperRun) -> None:
+        """Streaming pipeline: store each page fetch() yields as its own batch"""
+        self._pending_validators = {}
+        pages = iter(self.fetch())
+        while True:
+            with self._timed('fetch'):
+                item = next(pages, None)
+            if item is None:
+                return
+            self._store_batch(db, scraper_run, *item)
+
+    def _store_batch(self, db: Session, scraper_run: ScraperRun, checkpoint: str, page) -> None:
+        """Parse and store one page, then commit its checkpoint on the run row"""
+        with self._timed('parse'):
+            batch = self.parse(page)
+        # Store locks are released between batches, so parallel scrapers interleave
+        with self._timed('store_wait'):
+            locks = acquire_store_locks(self.STORE_TABLES)
+        with locks, self._timed('store'):
+            self.store(batch)
+
+        scraper_run.checkpoint = checkpoint
+        scraper_run.batches_stored = (scraper_run.batches_stored or 0) + 1
+        scraper_run.records_scraped = (scraper_run.records_scraped or 0) + len(batch)
+        db.commit()
+        self.resume_from = checkpoint
+        self.logger.info(f"[{self.scraper_name}] Stored batch {scraper_run.batches_stored}: {len(batch)} records (checkpoint {checkpoint})")
+
+    @contextmanager
+    def _timed(self, phase: str):
+        """
+        Add the duration of the block to self.timings[phase], and to self.phase_stats[phase]
+        the requests sent meanwhile, the peak RSS and, with COUNT_ROWS, the rows upserted
+        (in this thread)
+        """
+        started = time.perf_counter()
+        token = _current_phase.set(phase)
+        rows = {}
+        try:
+            with count_upserts() if COUNT_ROWS else nullcontext(rows) as rows:
+                yield
+        finally:
+            _current_phase.reset(token)
+            self.timings[phase] += time.perf_counter() - started
+            stats = self.phase_stats[phase]
+            for outcome, count in rows.items():
+                stats[f'rows_{outcome}'] += count
+            stats['peak_rss_mb'] = peak_rss_mb()
+
+    def _phase_stats(self):
+        """Stats of the phase in progress (None before the first run())"""
+        return self.phase_stats.get(_current_phase.get() or 'fetch')
+
+    def incremental_start(self, watermark):
+        """
+        First date to request given the newest stored date (the high watermark),
+        REVISION_LOOKBACK_DAYS earlier; None means the full history
+        """
+        if self.full_backfill or watermark is None:
+            return None
+        return watermark - timedelta(days=REVISION_LOOKBACK_DAYS)
+
+    def _fetch(self):
+        """Run fetch() (AsyncBaseScraper drives its coroutine here)"""
+        return self.fetch()
+
+    def _conditional_headers(self, url: str, headers: dict = None) -> dict:
+        """headers plus If-None-Match/If-Modified-Since from the validators stored for url"""
+        headers = dict(headers or {})
+        if self.full_backfill:
+            return headers
+
+        db = SessionLocal()
+        try:
+            etag, last_modified = load_http_validators(db, url)
         finally:
             db.close()
 
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def _check_modified(self, url: str, response):
+        """Raise NotModified on 304, otherwise remember the response's validators and return it"""
+        if response.status_code == 304:
+            self.logger.info(f"Not modified: {url}")
+            raise NotModified(url)
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code == 200 and (etag or last_modified):
+            self._pending_validators[url] = (etag, last_modified)
+        return response
+
+    def conditional_get(self, url: str, **kwargs) -> requests.Response:
+        """
+        GET that sends the validators of the last stored response for url
+        Raises NotModified if the source answers 304; the new validators are saved
+        only after this run's store() succeeded.
+        """
+        headers = self._conditional_headers(url, kwargs.pop('headers', None))
+        return self._check_modified(url, self.get(url, headers=headers, **kwargs))
+
+    def _breaker(self, url: str):
+        """Circuit breaker of url's host; None when replaying fixtures"""
+        if replaying():
+            return None
+        return circuit_breaker(httpx.URL(url).host)
+
+    def _retry_delay(self, method: str, url: str, attempt: int, attempts: int, response, error):
+        """Seconds to wait before retrying a request, or None if this outcome is final"""
+        if error is None and response.status_code not in RETRY_STATUSES:
+            return None
+        if attempt == attempts - 1:
+            return None
+
+        retry_after = retry_after_seconds(response.headers) if response is not None else None
+        delay = backoff_delay(attempt, retry_after)
+        reason = error or f"HTTP {response.status_code}"
+        self.logger.warning(f"{method} {url} failed ({reason}); retry {attempt + 1}/{attempts - 1} in {delay:.1f}s")
+        self.retries += 1
+        stats = self._phase_stats()
+        if stats is not None:
+            stats['retries'] += 1
+        return delay
+
+    def _throttle(self, url: str) -> float:
+        """Seconds to wait for a token from url's host bucket (shared by all scrapers)"""
+        delay = throttle_delay(url)
+        if delay >= 1:
+            self.logger.debug(f"Rate limited: waiting {delay:.1f}s for {httpx.URL(url).host}")
+        return delay
+
+    def _count_request(self, url: str, response, error, started: float, nbytes: int) -> None:
+        """Add one sent request to the per-host accounting"""
+        failed = error is not None or response.status_code in RETRY_STATUSES
+        record_request(url, nbytes, time.perf_counter() - started, failed)
+        stats = self._phase_stats()
+        if stats is not None:
+            stats['requests'] += 1
+            stats['bytes_downloaded'] += nbytes
+
+    def _request_outcome(self, breaker, response, error):
+        """Update the host's breaker, then return the response or raise the transport error"""
+        if breaker is not None:
+            if error is not None or response.status_code in RETRY_STATUSES:
+                breaker.record_failure(error or f"HTTP {response.status_code}")
+            else:
+                breaker.record_success()
+        if error is not None:
+            raise error
+        return response
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        requests call with common settings, retried on connection errors, timeouts and
+        429/5xx with backoff (honoring Retry-After); the last response is returned
+        """
+        breaker = self._breaker(url)
+        attempts = 1 if breaker is None else REQUEST_RETRIES + 1
+
+        for attempt in range(attempts):
+            if breaker is not None:
+                breaker.check()  # Raises CircuitOpen, also when another request opened it meanwhile
+            time.sleep(self._throttle(url))
+            response, error = None, None
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            # A streamed body is not read here; count what the server announced
+            nbytes = 0
+            if response is not None:
+                nbytes = int(response.headers.get('Content-Length') or 0) if kwargs.get('stream') else len(response.content)
+            self._count_request(url, response, error, started, nbytes)
+
+            delay = self._retry_delay(method, url, attempt, attempts, response, error)
+            if delay is None:
+                break
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+
+        return self._request_outcome(breaker, response, error)
+
     def get(self, url: str, **kwargs) -> requests.Response:
-        """Wrapper for requests.get with common settings"""
-        return self.session.get(url, timeout=30, **kwargs)
+        """Wrapper for requests.get with common settings and retries"""
+        return self.request('GET', url, **kwargs)
 
     def post(self, url: str, **kwargs) -> requests.Response:
-        """Wrapper for requests.post with common settings"""
-        return self.session.post(url, timeout=30, **kwargs)
+        """Wrapper for requests.post with common settings and retries"""
+        return self.request('POST', url, **kwargs)
 
     def soup(self, html: str) -> BeautifulSoup:
         """Create BeautifulSoup object from HTML"""
         return BeautifulSoup(html, 'lxml')
+
+
+class AsyncHTTPEngine:
+    """
+    Shared async HTTP client: one keep-alive pool plus a concurrency limit per host
+    Use as an async context manager inside a single event loop; every scraper
+    fetching through the same engine shares its connections and host limits.
+    """
+
+    def __init__(self, max_connections: int = HTTP_MAX_CONNECTIONS):
+        limits = httpx_limits(max_connections)
+        self.client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=REQUEST_TIMEOUT,
+            follow_redirects=True,  # requests follows redirects by default, httpx does not
+            limits=limits,
+            transport=fixture_transport(limits)  # Record/replay mode (see scrapers.http_fixtures)
+        )
+        self._host_limits = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = httpx.URL(url).host
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(HOST_CONCURRENCY.get(host, HTTP_HOST_CONCURRENCY))
+        return self._host_limits[host]
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request once a slot for its host is free"""
+        async with self._host_limit(url):
+            return await self.client.request(method, url, **kwargs)
+
+
+class AsyncBaseScraper(BaseScraper):
+    """
+    Base class for scrapers whose fetch() is a coroutine
+    Requests go through aget()/apost() on an AsyncHTTPEngine: run() opens one for
+    this scraper, run_all_scrapers shares one between scrapers. parse(), store()
+    and the synchronous get()/post() are unchanged.
+    """
+
+    def __init__(self, scraper_name: str, max_retries: int = 3, retry_delay: int = 5,
+                 full_backfill: bool = False):
+        super().__init__(scraper_name, max_retries, retry_delay, full_backfill)
+        self.http = None
+
+    @abstractmethod
+    async def fetch(self):
+        """Fetch raw data from source (coroutine; async generator when STREAMING) - must be implemented by subclass"""
+        pass
+
+    def _fetch(self):
+        return asyncio.run(self.fetch_with())
+
+    def _stream(self, db: Session, scraper_run: ScraperRun) -> None:
+        asyncio.run(self._astream(db, scraper_run))
+
+    async def _astream(self, db: Session, scraper_run: ScraperRun) -> None:
+        """
+        Streaming pipeline over an async generator fetch() on a new engine
+        A producer task keeps up to STREAM_QUEUE_PAGES pages downloaded ahead while each
+        batch is parsed and stored in a worker thread, so waiting on store locks or on a
+        commit never stalls the event loop. Batches are still stored one at a time, in order.
+        """
+        self._pending_validators = {}
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_PAGES)
+
+        async def produce():
+            # Runs in a copy of the context: its requests count as 'fetch' even while a batch is stored
+            _current_phase.set('fetch')
+            pages = self.fetch()
+            try:
+                async for item in pages:
+                    await queue.put(item)
+                await queue.put(None)
+            except Exception as e:
+                await queue.put(e)
+            finally:
+                await pages.aclose()
+
+        async with AsyncHTTPEngine() as engine:
+            self.http = engine
+            producer = asyncio.create_task(produce())
+            try:
+                while True:
+                    with self._timed('fetch'):  # Time the store waited on downloads
+                        item = await queue.get()
+                    if item is None:
+                        return
+                    if isinstance(item, Exception):
+                        raise item
+                    await asyncio.to_thread(self._store_batch, db, scraper_run, *item)
+            finally:
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+                self.http = None
+
+    async def fetch_with(self, engine: AsyncHTTPEngine = None):
+        """Await fetch() on engine (a new engine, closed afterwards, if None)"""
+        if engine is None:
+            async with AsyncHTTPEngine() as engine:
+                return await self.fetch_with(engine)
+
+        self.http = engine
+        try:
+            return await self.fetch()
+        finally:
+            self.http = None
+
+    async def arequest(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Async request() on the engine: same retries, backoff and circuit breaker"""
+        breaker = self._breaker(url)
+        attempts = 1 if breaker is None else REQUEST_RETRIES + 1
+
+        for attempt in range(attempts):
+            if breaker is not None:
+                breaker.check()  # Raises CircuitOpen, also when another request opened it meanwhile
+            await asyncio.sleep(self._throttle(url))
+            response, error = None, None
+            started = time.perf_counter()
+            try:
+                response = await self.http.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                error = e
+            self._count_request(url, response, error, started, len(response.content) if response is not None else 0)
+
+            delay = self._retry_delay(method, url, attempt, attempts, response, error)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+
+        return self._request_outcome(breaker, response, error)
+
+    async def aget(self, url: str, **kwargs) -> httpx.Response:
+        """Async GET with common settings (responses mirror requests: .json(), .text, .raise_for_status())"""
+        return await self.arequest('GET', url, **kwargs)
+
+    async def conditional_aget(self, url: str, **kwargs) -> httpx.Response:
+        """Async conditional_get (raises NotModified on 304)"""
+        headers = self._conditional_headers(url, kwargs.pop('headers', None))
+        return self._check_modified(url, await self.aget(url, headers=headers, **kwargs))
+
+    async def apost(self, url: str, **kwargs) -> httpx.Response:
+        """Async POST with common settings"""
+        return await self.arequest('POST', url, **kwargs)
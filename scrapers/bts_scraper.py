@@ -14,12 +14,14 @@ import io
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scrapers.base_scraper import BaseScraper
-from lib.database import SessionLocal, Lane
+from lib.database import SessionLocal, Lane, bulk_upsert
 
 
 class BTSScraper(BaseScraper):
     """Scrape freight lane data from BTS Freight Analysis Framework"""
 
+    STORE_TABLES = ('lanes',)
+
     # BTS FAF5 data URL (latest version as of 2024)
     # This is the regional database with O-D flows
     FAF_DATA_URL = "https://faf.ornl.gov/faf5/data/download_files/FAF5.4.1_2017-2022.csv"
@@ -169,37 +171,25 @@ class BTSScraper(BaseScraper):
     def store(self, lanes):
         """Store top lanes in database"""
         db = SessionLocal()
-        stored_count = 0
-        updated_count = 0
 
         try:
-            for lane_data in lanes:
-                # Check if lane already exists
-                existing = db.query(Lane).filter_by(
-                    origin=lane_data['origin'],
-                    destination=lane_data['destination'],
-                    equipment_type=lane_data['equipment_type']
-                ).first()
-
-                if existing:
-                    # Update volume rank based on tonnage
-                    existing.volume_rank = stored_count + updated_count + 1
-                    existing.distance_miles = lane_data['distance_miles']
-                    updated_count += 1
-                else:
-                    # Create new lane record
-                    new_lane = Lane(
-                        origin=lane_data['origin'],
-                        destination=lane_data['destination'],
-                        equipment_type=lane_data['equipment_type'],
-                        distance_miles=lane_data['distance_miles'],
-                        volume_rank=stored_count + updated_count + 1
-                    )
-                    db.add(new_lane)
-                    stored_count += 1
+            # Lanes arrive sorted by tonnage, so list position is the volume rank
+            rows = [{
+                'origin': lane_data['origin'],
+                'destination': lane_data['destination'],
+                'equipment_type': lane_data['equipment_type'],
+                'distance_miles': lane_data['distance_miles'],
+                'volume_rank': rank
+            } for rank, lane_data in enumerate(lanes, start=1)]
+
+            upserted_count = bulk_upsert(
+                db, Lane, rows,
+                index_elements=['origin', 'destination', 'equipment_type'],
+                update_columns=['volume_rank', 'distance_miles']
+            )
 
             db.commit()
-            self.logger.info(f"Stored {stored_count} new + updated {updated_count} lanes")
+            self.logger.info(f"Upserted {upserted_count} lanes")
 
         except Exception as e:
             db.rollback()
@@ -13,21 +13,36 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scrapers.base_scraper import BaseScraper
-from lib.database import SessionLocal, MacroMetric
+from lib.database import SessionLocal, upsert_series, upsert_observations
+from lib.dates import to_epoch_day
 
 
 class CassScraper(BaseScraper):
     """Scrape Cass Freight Index from press releases"""
 
+    STORE_TABLES = ('series', 'observations')
+
     BASE_URL = "https://www.cassinfo.com/freight-audit-payment/cass-transportation-indexes"
 
+    # Observation series written by this scraper
+    SERIES = {
+        'CASS_SHIPMENTS': {'name': 'Cass Freight Index: Shipments', 'frequency': 'monthly'},
+        'CASS_EXPENDITURES': {'name': 'Cass Freight Index: Expenditures', 'frequency': 'monthly'},
+    }
+
+    # Parsed field -> series id
+    FIELD_SERIES = {
+        'cass_shipments_index': 'CASS_SHIPMENTS',
+        'cass_expenditures_index': 'CASS_EXPENDITURES',
+    }
+
     def __init__(self):
         super().__init__('cass_scraper')
 
     def fetch(self):
         """Fetch Cass Index page"""
         self.logger.info(f"Fetching from {self.BASE_URL}")
-        response = self.get(self.BASE_URL)
+        response = self.conditional_get(self.BASE_URL)
         response.raise_for_status()
         return response.text
 
@@ -98,39 +113,29 @@ class CassScraper(BaseScraper):
     def store(self, metrics):
         """Store Cass metrics in database"""
         db = SessionLocal()
-        stored_count = 0
 
         try:
+            observations = []
             for metric_data in metrics:
                 if metric_data.get('_note'):
                     self.logger.warning(f"Skipping placeholder record: {metric_data['_note']}")
                     continue
 
-                # Get or create record for this month
-                existing = db.query(MacroMetric).filter_by(month=metric_data['month']).first()
-
-                if existing:
-                    # Update existing record
-                    if metric_data.get('cass_shipments_index'):
-                        existing.cass_shipments_index = metric_data['cass_shipments_index']
-                    if metric_data.get('cass_expenditures_index'):
-                        existing.cass_expenditures_index = metric_data['cass_expenditures_index']
-                    existing.source = 'Cass'
-                    existing.confidence = 1.0
-                else:
-                    # Create new record
-                    new_metric = MacroMetric(
-                        month=metric_data['month'],
-                        cass_shipments_index=metric_data.get('cass_shipments_index'),
-                        cass_expenditures_index=metric_data.get('cass_expenditures_index'),
-                        source='Cass',
-                        confidence=1.0
-                    )
-                    db.add(new_metric)
-                    stored_count += 1
+                # Only store index values we actually parsed
+                for field, series_id in self.FIELD_SERIES.items():
+                    if metric_data.get(field):
+                        observations.append({
+                            'series_id': series_id,
+                            'period': to_epoch_day(metric_data['month']),  # First of the month
+                            'value': metric_data[field],
+                            'source': 'Cass'
+                        })
+
+            upsert_series(db, 'Cass', self.SERIES)
+            stored_count = upsert_observations(db, observations)
 
             db.commit()
-            self.logger.info(f"Stored/updated {stored_count} Cass metrics")
+            self.logger.info(f"Stored/updated {stored_count} Cass observations")
 
         except Exception as e:
             db.rollback()
@@ -0,0 +1,82 @@
+"""
+Per-host circuit breakers for scraper HTTP requests
+After BREAKER_THRESHOLD consecutive failed requests (each already retried with
+backoff) a host is "open": requests to it fail immediately with CircuitOpen for
+BREAKER_COOLDOWN_SECONDS. The first request after the cooldown goes through; a
+success closes the breaker, another failure reopens it. State is stored in the
+circuit_breakers table, so a source that was down stays skipped across runs.
+"""
+
+from datetime import datetime, timedelta
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.database import SessionLocal, load_circuit_breaker, save_circuit_breaker
+
+BREAKER_THRESHOLD = int(os.getenv("SCRAPER_BREAKER_THRESHOLD", "3"))
+BREAKER_COOLDOWN_SECONDS = int(os.getenv("SCRAPER_BREAKER_COOLDOWN", "1800"))
+
+
+class CircuitOpen(Exception):
+    """Requests to a host are short-circuited while its breaker is open"""
+
+
+class CircuitBreaker:
+    """Breaker state of one host (shared by every scraper in the process)"""
+
+    def __init__(self, host: str, failures: int = 0, opened_until: datetime = None, last_error: str = None):
+        self.host = host
+        self.failures = failures
+        self.opened_until = opened_until
+        self.last_error = last_error
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        """Raise CircuitOpen if the host is still cooling down"""
+        if self.opened_until and datetime.utcnow() < self.opened_until:
+            raise CircuitOpen(
+                f"{self.host} skipped until {self.opened_until:%Y-%m-%d %H:%M} UTC "
+                f"after {self.failures} failed requests (last: {self.last_error})"
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            if not self.failures and not self.opened_until:
+                return  # Already closed - nothing to persist
+            self.failures, self.opened_until, self.last_error = 0, None, None
+            self._save()
+
+    def record_failure(self, error) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)[:500]
+            if self.failures >= BREAKER_THRESHOLD:
+                self.opened_until = datetime.utcnow() + timedelta(seconds=BREAKER_COOLDOWN_SECONDS)
+            self._save()
+
+    def _save(self) -> None:
+        db = SessionLocal()
+        try:
+            save_circuit_breaker(db, self.host, self.failures, self.opened_until, self.last_error)
+            db.commit()
+        finally:
+            db.close()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def circuit_breaker(host: str) -> CircuitBreaker:
+    """The breaker for host, loaded from the database on first use"""
+    with _breakers_lock:
+        if host not in _breakers:
+            db = SessionLocal()
+            try:
+                _breakers[host] = CircuitBreaker(host, *load_circuit_breaker(db, host))
+            finally:
+                db.close()
+        return _breakers[host]
@@ -4,119 +4,172 @@ Fetches weekly retail diesel prices (national and regional)
 Source: https://www.eia.gov/
 """
 
-import requests
+import argparse
+import asyncio
 from datetime import datetime
+import json
 import sys
 import os
 from dotenv import load_dotenv
+from sqlalchemy import func
 
 load_dotenv()
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scrapers.base_scraper import BaseScraper
-from lib.database import SessionLocal, DailyMetric, DieselPrice
+from scrapers.base_scraper import AsyncBaseScraper
+from lib.database import SessionLocal, DieselPrice, bulk_upsert, upsert_series, upsert_observations
+from lib.dates import to_epoch_day
+from lib.rollups import refresh_diesel_rollups
 
 
-class EIADieselScraper(BaseScraper):
+class EIADieselScraper(AsyncBaseScraper):
     """Scrape diesel prices from EIA API"""
 
+    STORE_TABLES = ('diesel_prices', 'diesel_price_rollups', 'series', 'observations')
+
     API_BASE = "https://api.eia.gov/v2/petroleum/pri/gnd/data/"
 
+    # Records per API request (EIA maximum) and overall safety limit
+    PAGE_LENGTH = 5000
+    MAX_RECORDS = 100000  # About 10+ years of weekly data for 29 regions
+
+    # Pages are parsed and stored as they arrive; this many are requested at a time
+    STREAMING = True
+    PREFETCH_PAGES = 4
+
     # Diesel price series
     # EMD_EPD2D_PTE_NUS_DPG = US No 2 Diesel Retail Prices
     SERIES_ID = "EMD_EPD2D_PTE_NUS_DPG"
 
-    def __init__(self):
-        super().__init__('eia_diesel_scraper')
+    # National price is also kept as an observation series (feeds daily_metrics.diesel_usd_per_gal)
+    SERIES = {
+        'EIA_DIESEL_NUS': {'name': 'U.S. No 2 Diesel Retail Price', 'frequency': 'weekly', 'units': 'USD/gal'},
+    }
+
+    def __init__(self, full_backfill: bool = False):
+        super().__init__('eia_diesel_scraper', full_backfill=full_backfill)
         self.api_key = os.getenv('EIA_API_KEY')
 
         if not self.api_key:
             self.logger.warning("EIA_API_KEY not found - will try web scraping fallback")
 
-    def fetch(self):
-        """Fetch diesel prices from EIA"""
+    async def fetch(self):
+        """Yield (checkpoint, page) pairs of diesel prices from EIA (streamed, see BaseScraper.STREAMING)"""
 
         if self.api_key:
-            return self._fetch_via_api()
+            async for checkpoint, page in self._fetch_via_api():
+                yield checkpoint, page
         else:
-            return self._fetch_via_web_scraping()
-
-    def _fetch_via_api(self):
-        """Fetch using EIA API (preferred method)"""
-        self.logger.info("Fetching ALL diesel prices (national + regional) via EIA API with 5+ years of history...")
-
-        # Fetch ALL diesel price data - national and regional
-        # We want MAXIMUM data collection for detailed analysis
-        # EIA API limits to 5000 records per request, so we'll fetch in batches
-
-        all_data = []
-        offset = 0
-        length = 5000
-        total_available = None
+            yield 'web', await self._fetch_via_web_scraping()
 
+    def _start_date(self):
+        """First week to request: the newest stored price minus the revision lookback (None = full history)"""
+        db = SessionLocal()
         try:
-            # Fetch data in batches using pagination
-            while True:
-                params = {
-                    'api_key': self.api_key,
-                    'frequency': 'weekly',
-                    'data[0]': 'value',
-                    'sort[0][column]': 'period',
-                    'sort[0][direction]': 'desc',
-                    'offset': offset,
-                    'length': length
-                }
-
-                response = self.get(self.API_BASE, params=params)
-                response.raise_for_status()
-
-                data = response.json()
-
-                if 'response' in data and 'data' in data['response']:
-                    batch = data['response']['data']
-
-                    if not batch:
-                        # No more data
-                        break
-
-                    all_data.extend(batch)
-
-                    # Get total count from API response
-                    if total_available is None and 'response' in data and 'total' in data['response']:
-                        total_available = data['response']['total']
-                        self.logger.info(f"API reports {total_available} total records available")
-
-                    self.logger.info(f"Fetched batch: offset={offset}, records={len(batch)}, total_so_far={len(all_data)}")
-
-                    # If we got fewer records than requested, we've reached the end
-                    if len(batch) < length:
-                        break
+            watermark = db.query(func.max(DieselPrice.date)).scalar()
+        finally:
+            db.close()
+        return self.incremental_start(watermark)
 
-                    offset += length
+    def _resume_point(self):
+        """(start, offset) of the first API page not stored by the interrupted run, or None"""
+        try:
+            checkpoint = json.loads(self.resume_from or 'null')
+        except ValueError:
+            return None  # 'web' - the fallback page is a single batch
+        if not isinstance(checkpoint, dict):
+            return None
+        start = checkpoint.get('start')
+        return (datetime.strptime(start, '%Y-%m-%d').date() if start else None), checkpoint['offset']
+
+    def _checkpoint(self, start, offset):
+        """Checkpoint for API pages stored up to offset (the same start keeps offsets comparable)"""
+        return json.dumps({'start': start.isoformat() if start else None, 'offset': offset})
+
+    async def _fetch_page(self, offset, start=None):
+        """One page of weekly diesel prices (from start onward); returns the API 'response' object or None"""
+        params = {
+            'api_key': self.api_key,
+            'frequency': 'weekly',
+            'data[0]': 'value',
+            'sort[0][column]': 'period',
+            'sort[0][direction]': 'desc',
+            'offset': offset,
+            'length': self.PAGE_LENGTH
+        }
+        if start:
+            params['start'] = start.isoformat()
+
+        response = await self.aget(self.API_BASE, params=params)
+        response.raise_for_status()
 
-                    # Safety limit: max 100k records (about 10+ years of weekly data for 29 regions)
-                    if len(all_data) >= 100000:
-                        self.logger.warning(f"Reached safety limit of 100,000 records")
-                        break
-                else:
-                    self.logger.warning("Unexpected API response format, falling back to web scraping")
-                    return self._fetch_via_web_scraping()
+        data = response.json()
+        if 'response' in data and 'data' in data['response']:
+            return data['response']
+        return None
+
+    async def _fetch_via_api(self):
+        """
+        Yield pages from the EIA API (preferred method)
+        Pages are sorted newest first, so weeks published since an interrupted run
+        only shift already stored rows into the resumed pages, never past them.
+        """
+        resume = self._resume_point()
+        if resume:
+            start, offset = resume
+            self.logger.info(f"Resuming EIA API pages at offset {offset}")
+        else:
+            start, offset = self._start_date(), 0
+            if start:
+                self.logger.info(f"Fetching diesel prices (national + regional) via EIA API since {start.isoformat()}...")
+            else:
+                self.logger.info("Fetching ALL diesel prices (national + regional) via EIA API with 5+ years of history...")
 
-            self.logger.info(f"Fetched {len(all_data)} total diesel price records (all regions, all available history)")
-            return all_data
+        # Fetch ALL diesel price data - national and regional
+        # We want MAXIMUM data collection for detailed analysis
+        # EIA API limits to 5000 records per request: the first page reports the total,
+        # then the remaining pages are requested PREFETCH_PAGES at a time
 
+        try:
+            first = await self._fetch_page(offset, start)
         except Exception as e:
+            if resume:
+                raise  # Part of the API history is stored - retry the API rather than switch sources
             self.logger.error(f"API fetch failed: {e}, falling back to web scraping")
-            return self._fetch_via_web_scraping()
-
-    def _fetch_via_web_scraping(self):
+            first = None
+        if first is None:
+            if resume:
+                raise ValueError("Unexpected API response format")
+            self.logger.warning("Falling back to web scraping")
+            yield 'web', await self._fetch_via_web_scraping()
+            return
+
+        total_available = int(first.get('total') or len(first['data']))
+        self.logger.info(f"API reports {total_available} total records available")
+        if total_available > self.MAX_RECORDS:
+            self.logger.warning(f"Reached safety limit of {self.MAX_RECORDS:,} records")
+        yield self._checkpoint(start, offset + self.PAGE_LENGTH), first['data']
+
+        # A failing later page fails the attempt; run() retries from the last stored page
+        offsets = range(offset + self.PAGE_LENGTH, min(total_available, self.MAX_RECORDS), self.PAGE_LENGTH)
+        for i in range(0, len(offsets), self.PREFETCH_PAGES):
+            window = offsets[i:i + self.PREFETCH_PAGES]
+            pages = await asyncio.gather(*(self._fetch_page(page_offset, start) for page_offset in window))
+
+            for page_offset, page in zip(window, pages):
+                if page is None:
+                    raise ValueError(f"Unexpected API response format at offset {page_offset}")
+                self.logger.info(f"Fetched batch: offset={page_offset}, records={len(page['data'])}")
+                yield self._checkpoint(start, page_offset + self.PAGE_LENGTH), page['data']
+
+    async def _fetch_via_web_scraping(self):
         """Fallback: scrape from EIA website"""
         self.logger.info("Fetching diesel prices via web scraping...")
 
         url = "https://www.eia.gov/dnav/pet/hist/LeafHandler.ashx?n=pet&s=emd_epd2d_pte_nus_dpg&f=w"
 
-        response = self.get(url)
+        response = await self.conditional_aget(url)
         response.raise_for_status()
 
         return response.text
@@ -212,64 +265,50 @@ class EIADieselScraper(BaseScraper):
     def store(self, prices):
         """Store diesel prices in database"""
         db = SessionLocal()
-        stored_count = 0
-        updated_count = 0
-        regional_stored = 0
-        regional_updated = 0
 
         try:
+            regional_rows = []
+            observations = []
+
             for price_data in prices:
-                date = price_data['date']
+                date = to_epoch_day(price_data['date'])
                 price = price_data['diesel_price']
                 region_code = price_data.get('region_code', 'UNKNOWN')
-                region_name = price_data.get('region_name', 'Unknown')
-                series_desc = price_data.get('series_description', '')
 
                 # Store ALL regional diesel prices in the DieselPrice table
-                existing_regional = db.query(DieselPrice).filter_by(
-                    date=date,
-                    region_code=region_code
-                ).first()
-
-                if existing_regional:
-                    existing_regional.price = price
-                    existing_regional.region_name = region_name
-                    existing_regional.series_description = series_desc
-                    regional_updated += 1
-                else:
-                    new_regional = DieselPrice(
-                        date=date,
-                        region_code=region_code,
-                        region_name=region_name,
-                        price=price,
-                        series_description=series_desc,
-                        source='EIA'
-                    )
-                    db.add(new_regional)
-                    regional_stored += 1
-
-                # ALSO store national (NUS) price in DailyMetric for backward compatibility
+                regional_rows.append({
+                    'date': date,
+                    'region_code': region_code,
+                    'region_name': price_data.get('region_name', 'Unknown'),
+                    'price': price,
+                    'series_description': price_data.get('series_description', ''),
+                    'source': 'EIA'
+                })
+
+                # ALSO store national (NUS) price as an observation series
                 if region_code == 'NUS':
-                    existing_daily = db.query(DailyMetric).filter_by(date=date).first()
-
-                    if existing_daily:
-                        existing_daily.diesel_usd_per_gal = price
-                        if not existing_daily.source or 'EIA' not in existing_daily.source:
-                            existing_daily.source = 'EIA'
-                        updated_count += 1
-                    else:
-                        new_daily = DailyMetric(
-                            date=date,
-                            diesel_usd_per_gal=price,
-                            source='EIA',
-                            confidence=1.0
-                        )
-                        db.add(new_daily)
-                        stored_count += 1
+                    observations.append({
+                        'series_id': 'EIA_DIESEL_NUS',
+                        'period': date,
+                        'value': price,
+                        'source': 'EIA'
+                    })
+
+            regional_upserted = bulk_upsert(
+                db, DieselPrice, regional_rows,
+                index_elements=['date', 'region_code'],
+                update_columns=['price', 'region_name', 'series_description']
+            )
+
+            # Re-aggregate only the weeks/months/years these rows fall into
+            rollup_periods = refresh_diesel_rollups(db, {row['date'] for row in regional_rows})
+
+            upsert_series(db, 'EIA', self.SERIES)
+            national_upserted = upsert_observations(db, observations)
 
             db.commit()
-            self.logger.info(f"Stored {regional_stored} new + updated {regional_updated} regional diesel prices")
-            self.logger.info(f"Stored {stored_count} new + updated {updated_count} national diesel prices in DailyMetric")
+            self.logger.info(f"Upserted {regional_upserted} regional diesel prices, refreshed {rollup_periods} rollup periods")
+            self.logger.info(f"Upserted {national_upserted} national diesel price observations")
 
         except Exception as e:
             db.rollback()
@@ -281,7 +320,12 @@ class EIADieselScraper(BaseScraper):
 
 def main():
     """Run EIA diesel scraper"""
-    scraper = EIADieselScraper()
+    parser = argparse.ArgumentParser(description="Fetch EIA retail diesel prices")
+    parser.add_argument("--full-backfill", action="store_true",
+                        help="Request the full history instead of only new and recently revised weeks")
+    args = parser.parse_args()
+
+    scraper = EIADieselScraper(full_backfill=args.full_backfill)
 
     if not scraper.api_key:
         print("⚠️  Warning: EIA_API_KEY not set in .env")
@@ -4,8 +4,8 @@ Fetches economic indicators that impact freight markets
 Source: https://fred.stlouisfed.org/
 """
 
-import requests
-from datetime import datetime, timedelta
+import argparse
+import asyncio
 import sys
 import os
 from dotenv import load_dotenv
@@ -14,90 +14,103 @@ load_dotenv()
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scrapers.base_scraper import BaseScraper
-from lib.database import SessionLocal, DailyMetric, MacroMetric
+from scrapers.base_scraper import AsyncBaseScraper
+from lib.database import SessionLocal, latest_periods, upsert_series, upsert_observations
+from lib.dates import to_epoch_day
 
 
-class FREDScraper(BaseScraper):
+class FREDScraper(AsyncBaseScraper):
     """Scrape economic indicators from FRED API"""
 
+    STORE_TABLES = ('series', 'observations')
+
     API_BASE = "https://api.stlouisfed.org/fred/series/observations"
 
-    # Economic indicators relevant to freight
+    # Economic indicators relevant to freight (stored as observations, see lib.database.WIDE_VIEW_COLUMNS)
     SERIES = {
         # Manufacturing & Industrial
-        'IPMAN': {'name': 'Industrial Production: Manufacturing', 'table': 'macro', 'field': 'industrial_production'},
-        'BSCICP03USM665S': {'name': 'OECD Business Confidence: Manufacturing (US)', 'table': 'macro', 'field': 'ism_pmi'},
+        'IPMAN': {'name': 'Industrial Production: Manufacturing', 'frequency': 'monthly'},
+        'BSCICP03USM665S': {'name': 'OECD Business Confidence: Manufacturing (US)', 'frequency': 'monthly'},
 
         # Consumer & Retail
-        'RSXFS': {'name': 'Retail Sales', 'table': 'macro', 'field': 'retail_sales'},
-        'UMCSENT': {'name': 'Consumer Sentiment', 'table': 'macro', 'field': 'consumer_sentiment'},
+        'RSXFS': {'name': 'Retail Sales', 'frequency': 'monthly'},
+        'UMCSENT': {'name': 'Consumer Sentiment', 'frequency': 'monthly'},
 
         # Transportation specific
-        'TRUCKD11': {'name': 'ATA Truck Tonnage Index', 'table': 'macro', 'field': 'ata_tonnage_index'},
-        'FRGSHPUSM649NCIS': {'name': 'Cass Freight Index: Shipments', 'table': 'macro', 'field': 'cass_shipments_index'},
-        'FRGEXPUSM649NCIS': {'name': 'Cass Freight Index: Expenditures', 'table': 'macro', 'field': 'cass_expenditures_index'},
+        'TRUCKD11': {'name': 'ATA Truck Tonnage Index', 'frequency': 'monthly'},
+        'FRGSHPUSM649NCIS': {'name': 'Cass Freight Index: Shipments', 'frequency': 'monthly'},
+        'FRGEXPUSM649NCIS': {'name': 'Cass Freight Index: Expenditures', 'frequency': 'monthly'},
 
         # Fuel/Energy
-        'GASREGW': {'name': 'Gas Prices (Weekly)', 'table': 'daily', 'field': 'gas_price'},
-        'DCOILWTICO': {'name': 'Crude Oil WTI', 'table': 'daily', 'field': 'oil_price'},
+        'GASREGW': {'name': 'Gas Prices (Weekly)', 'frequency': 'weekly'},
+        'DCOILWTICO': {'name': 'Crude Oil WTI', 'frequency': 'daily'},
     }
 
-    def __init__(self):
-        super().__init__('fred_scraper')
+    def __init__(self, full_backfill: bool = False):
+        super().__init__('fred_scraper', full_backfill=full_backfill)
         self.api_key = os.getenv('FRED_API_KEY')
 
         if not self.api_key:
             self.logger.warning("FRED_API_KEY not found in .env - will use limited access")
 
-    def fetch(self):
-        """Fetch all configured FRED series"""
-        all_data = {}
+    async def fetch(self):
+        """Fetch all configured FRED series concurrently (from each series' high watermark onward)"""
+        db = SessionLocal()
+        try:
+            watermarks = latest_periods(db, self.SERIES)
+        finally:
+            db.close()
 
-        for series_id, config in self.SERIES.items():
-            try:
-                self.logger.info(f"Fetching {config['name']} ({series_id})...")
+        results = await asyncio.gather(*(
+            self._fetch_series(series_id, config, self.incremental_start(watermarks.get(series_id)))
+            for series_id, config in self.SERIES.items()
+        ))
+        return {series_id: data for series_id, data in results if data}
 
-                params = {
-                    'series_id': series_id,
-                    'file_type': 'json',
-                    'sort_order': 'desc',
-                    'limit': 100000  # Get ALL available history (FRED supports up to 100k)
-                }
+    async def _fetch_series(self, series_id, config, start=None):
+        """Fetch one series (observations from start, or the full history); returns (series_id, data or None)"""
+        try:
+            since = f" since {start.isoformat()}" if start else " (full history)"
+            self.logger.info(f"Fetching {config['name']} ({series_id}){since}...")
 
-                if self.api_key:
-                    params['api_key'] = self.api_key
+            params = {
+                'series_id': series_id,
+                'file_type': 'json',
+                'sort_order': 'desc',
+                'limit': 100000  # Get ALL available history (FRED supports up to 100k)
+            }
 
-                response = self.get(self.API_BASE, params=params)
-                response.raise_for_status()
+            if start:
+                params['observation_start'] = start.isoformat()
 
-                data = response.json()
+            if self.api_key:
+                params['api_key'] = self.api_key
 
-                if 'observations' in data:
-                    all_data[series_id] = {
-                        'config': config,
-                        'observations': data['observations']
-                    }
-                    self.logger.info(f"  → {len(data['observations'])} observations")
-                else:
-                    self.logger.warning(f"  → No data returned for {series_id}")
+            response = await self.aget(self.API_BASE, params=params)
+            response.raise_for_status()
 
-            except Exception as e:
-                self.logger.error(f"Error fetching {series_id}: {e}")
-                continue
+            data = response.json()
 
-        return all_data
+            if 'observations' in data:
+                self.logger.info(f"  → {series_id}: {len(data['observations'])} observations")
+                return series_id, {
+                    'config': config,
+                    'observations': data['observations']
+                }
+
+            self.logger.warning(f"  → No data returned for {series_id}")
+
+        except Exception as e:
+            self.logger.error(f"Error fetching {series_id}: {e}")
+
+        return series_id, None
 
     def parse(self, raw_data):
-        """Parse FRED observations into our data model"""
-        daily_metrics = []
-        macro_metrics = []
+        """Parse FRED observations into long-format rows"""
+        observations = []
 
         for series_id, series_data in raw_data.items():
-            config = series_data['config']
-            observations = series_data['observations']
-
-            for obs in observations:
+            for obs in series_data['observations']:
                 try:
                     date = obs['date']
                     value = obs['value']
@@ -106,86 +119,30 @@ class FREDScraper(BaseScraper):
                     if value == '.':
                         continue
 
-                    value = float(value)
-
-                    # Determine if daily or macro (monthly)
-                    if config['table'] == 'daily':
-                        daily_metrics.append({
-                            'date': date,
-                            'field': config['field'],
-                            'value': value,
-                            'source': f"FRED-{series_id}"
-                        })
-                    else:  # macro (monthly)
-                        # Convert to YYYY-MM format
-                        dt = datetime.strptime(date, '%Y-%m-%d')
-                        month = dt.strftime('%Y-%m')
-
-                        macro_metrics.append({
-                            'month': month,
-                            'field': config['field'],
-                            'value': value,
-                            'source': f"FRED-{series_id}"
-                        })
+                    observations.append({
+                        'series_id': series_id,
+                        'period': to_epoch_day(date),  # Monthly series are dated the 1st
+                        'value': float(value),
+                        'source': 'FRED'
+                    })
 
                 except Exception as e:
                     self.logger.debug(f"Error parsing observation: {e}")
                     continue
 
-        self.logger.info(f"Parsed {len(daily_metrics)} daily + {len(macro_metrics)} macro observations")
-        return {'daily': daily_metrics, 'macro': macro_metrics}
+        self.logger.info(f"Parsed {len(observations)} observations")
+        return observations
 
-    def store(self, parsed_data):
-        """Store FRED data in database"""
+    def store(self, observations):
+        """Store FRED observations in database"""
         db = SessionLocal()
-        daily_stored = 0
-        macro_stored = 0
 
         try:
-            # Store daily metrics
-            for metric in parsed_data['daily']:
-                existing = db.query(DailyMetric).filter_by(date=metric['date']).first()
-
-                if existing:
-                    # Update field (e.g., gas_price, oil_price)
-                    setattr(existing, metric['field'], metric['value'])
-                    if not existing.source or 'FRED' not in existing.source:
-                        existing.source = metric['source']
-                else:
-                    # Create new record
-                    new_metric = DailyMetric(
-                        date=metric['date'],
-                        source=metric['source'],
-                        confidence=1.0
-                    )
-                    setattr(new_metric, metric['field'], metric['value'])
-                    db.add(new_metric)
-                    db.flush()  # Make visible to subsequent queries
-                    daily_stored += 1
-
-            # Store macro metrics
-            for metric in parsed_data['macro']:
-                existing = db.query(MacroMetric).filter_by(month=metric['month']).first()
-
-                if existing:
-                    # Update field
-                    setattr(existing, metric['field'], metric['value'])
-                    if not existing.source or 'FRED' not in existing.source:
-                        existing.source = metric['source']
-                else:
-                    # Create new record
-                    new_metric = MacroMetric(
-                        month=metric['month'],
-                        source=metric['source'],
-                        confidence=1.0
-                    )
-                    setattr(new_metric, metric['field'], metric['value'])
-                    db.add(new_metric)
-                    db.flush()  # Make visible to subsequent queries
-                    macro_stored += 1
+            upsert_series(db, 'FRED', self.SERIES)
+            stored = upsert_observations(db, observations)
 
             db.commit()
-            self.logger.info(f"Stored {daily_stored} daily + {macro_stored} macro metrics")
+            self.logger.info(f"Upserted {stored} observations")
 
         except Exception as e:
             db.rollback()
@@ -197,7 +154,12 @@ class FREDScraper(BaseScraper):
 
 def main():
     """Run FRED scraper"""
-    scraper = FREDScraper()
+    parser = argparse.ArgumentParser(description="Fetch FRED economic indicators")
+    parser.add_argument("--full-backfill", action="store_true",
+                        help="Request the full history instead of only new and recently revised observations")
+    args = parser.parse_args()
+
+    scraper = FREDScraper(full_backfill=args.full_backfill)
 
     if not scraper.api_key:
         print("⚠️  Warning: FRED_API_KEY not set in .env")
@@ -0,0 +1,155 @@
+"""
+Process-wide HTTP client registry for scrapers
+Every scraper's requests session mounts the same transport adapter, so connections
+(and their TLS sessions) are pooled and kept alive across scrapers. Every request,
+sync or async, first takes a token from its host's bucket, so scrapers running in
+parallel share one request rate per host instead of each hitting the source's quota.
+Requests are counted per host for the run summary.
+
+Async scrapers open an httpx client per run (it is bound to that run's event loop);
+it uses the keep-alive settings of httpx_limits() and the same token buckets.
+"""
+
+from collections import defaultdict
+import os
+import sys
+import threading
+import time
+
+import httpx
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers import http_fixtures
+from scrapers.http_fixtures import MODE_LIVE, FixtureAdapter, replaying
+
+# Connection pools (override via .env): hosts with a pool, connections kept alive per host,
+# seconds an idle async connection is kept
+HTTP_POOL_HOSTS = int(os.getenv("SCRAPER_POOL_HOSTS", "16"))
+HTTP_POOL_SIZE = int(os.getenv("SCRAPER_POOL_SIZE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("SCRAPER_KEEPALIVE_EXPIRY", "30"))
+
+# Request rate of hosts without an entry below: requests per second, burst
+DEFAULT_RATE = float(os.getenv("SCRAPER_DEFAULT_RATE", "5"))
+DEFAULT_BURST = int(os.getenv("SCRAPER_DEFAULT_BURST", "10"))
+
+# Per-host (requests per second, burst) below the published quotas; HTML sites get a polite rate
+HOST_RATE_LIMITS = {
+    'api.stlouisfed.org': (2.0, 10),  # FRED: 120 requests per minute per key
+    'api.eia.gov': (1.0, 5),  # EIA: about 5,000 requests per hour
+    'api.usaspending.gov': (2.0, 5),
+    'www.trucking.org': (0.5, 2),
+    'www.cassinfo.com': (0.5, 2),
+    'www.eia.gov': (0.5, 2),
+}
+
+
+def parse_rate_limits(value: str) -> dict:
+    """{host: (rate, burst)} from "host=rate[:burst],..." (SCRAPER_RATE_LIMITS)"""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in value.split(','))):
+        host, _, spec = entry.partition('=')
+        rate, _, burst = spec.partition(':')
+        limits[host.strip()] = (float(rate), int(burst) if burst else max(1, int(float(rate))))
+    return limits
+
+
+HOST_RATE_LIMITS.update(parse_rate_limits(os.getenv("SCRAPER_RATE_LIMITS", "")))
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every thread and event loop of the process
+    reserve() always takes a token and tells the caller how long to wait before
+    using it, so waiting requests queue in order without holding the lock.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token; seconds until it is available (0 if right away)"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+_buckets = {}
+_adapters = {}
+_stats = defaultdict(lambda: {'requests': 0, 'errors': 0, 'bytes': 0, 'throttled': 0.0, 'seconds': 0.0})
+_registry_lock = threading.Lock()
+
+
+def rate_limiter(host: str) -> TokenBucket:
+    """The token bucket of host"""
+    with _registry_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(*HOST_RATE_LIMITS.get(host, (DEFAULT_RATE, DEFAULT_BURST)))
+        return _buckets[host]
+
+
+def throttle_delay(url: str) -> float:
+    """Take a token for url's host; seconds to wait before sending (0 when replaying fixtures)"""
+    if replaying():
+        return 0.0
+    host = httpx.URL(url).host
+    delay = rate_limiter(host).reserve()
+    if delay:
+        with _registry_lock:
+            _stats[host]['throttled'] += delay
+    return delay
+
+
+def record_request(url: str, nbytes: int, seconds: float, failed: bool) -> None:
+    """Count one sent request (failed: transport error or retryable status)"""
+    with _registry_lock:
+        stats = _stats[httpx.URL(url).host]
+        stats['requests'] += 1
+        stats['errors'] += failed
+        stats['bytes'] += nbytes
+        stats['seconds'] += seconds
+
+
+def request_stats() -> dict:
+    """{host: {requests, errors, bytes, throttled, seconds}} since the last reset"""
+    with _registry_lock:
+        return {host: dict(stats) for host, stats in _stats.items()}
+
+
+def reset_request_stats() -> None:
+    with _registry_lock:
+        _stats.clear()
+
+
+def shared_adapter() -> HTTPAdapter:
+    """The process-wide transport adapter for the current record/replay mode"""
+    mode = http_fixtures.HTTP_MODE
+    with _registry_lock:
+        if mode not in _adapters:
+            pool = {'pool_connections': HTTP_POOL_HOSTS, 'pool_maxsize': HTTP_POOL_SIZE}
+            _adapters[mode] = HTTPAdapter(**pool) if mode == MODE_LIVE else FixtureAdapter(mode, **pool)
+        return _adapters[mode]
+
+
+def mount_shared_adapter(session) -> None:
+    """Route a requests session through the shared pools (and record/replay, see scrapers.http_fixtures)"""
+    adapter = shared_adapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+
+def httpx_limits(max_connections: int) -> httpx.Limits:
+    """Pool limits for an async client"""
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
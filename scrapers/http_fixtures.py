@@ -0,0 +1,173 @@
+"""
+HTTP record/replay for scrapers
+In record mode every response a scraper receives (sync requests session or async
+engine) is also saved, compressed, under FIXTURES_DIR; in replay mode responses are
+served from there and nothing touches the network, so fetch/parse/store can be
+benchmarked and profiled reproducibly offline.
+
+Fixtures are keyed by method, URL (query sorted, credentials removed) and request body.
+"""
+
+from hashlib import sha1
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import json
+import os
+import sys
+
+import httpx
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.compression import CODEC_ZLIB, CODEC_ZSTD, DEFAULT_CODEC, compress_bytes, decompress_bytes
+
+MODE_LIVE = 'live'
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+HTTP_MODES = [MODE_LIVE, MODE_RECORD, MODE_REPLAY]
+
+# Set via .env or set_http_mode() (run_all_scrapers --record/--replay) before scrapers are created
+HTTP_MODE = os.getenv("SCRAPER_HTTP_MODE", MODE_LIVE)
+FIXTURES_DIR = os.getenv("SCRAPER_FIXTURES_DIR", "data/fixtures")
+
+# Query parameters never written to a fixture (or its key)
+REDACTED_PARAMS = {'api_key', 'apikey', 'token'}
+
+# The stored body is already decoded, so these no longer describe it
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+
+class FixtureNotFound(LookupError):
+    """Replay mode got a request that was never recorded"""
+
+
+def set_http_mode(mode: str, fixtures_dir: str = None) -> None:
+    """Switch record/replay for scrapers created from now on"""
+    global HTTP_MODE, FIXTURES_DIR
+    if mode not in HTTP_MODES:
+        raise ValueError(f"Unknown HTTP mode: {mode}")
+    HTTP_MODE = mode
+    if fixtures_dir:
+        FIXTURES_DIR = fixtures_dir
+
+
+def replaying() -> bool:
+    """True if responses come from fixtures (no retries or circuit breakers needed)"""
+    return HTTP_MODE == MODE_REPLAY
+
+
+def _redacted_url(url: str) -> str:
+    """url with credentials removed and query parameters sorted"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in REDACTED_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+
+def fixture_path(method: str, url: str, body: bytes = b'', codec: str = DEFAULT_CODEC) -> str:
+    """File holding the recorded response to a request (the extension names the codec)"""
+    redacted = _redacted_url(url)
+    key = sha1(f"{method.upper()} {redacted}\n".encode() + (body or b'')).hexdigest()
+    return os.path.join(FIXTURES_DIR, urlsplit(url).netloc, f"{key}.{codec}")
+
+
+def save_fixture(method: str, url: str, body: bytes, status: int, headers, content: bytes) -> str:
+    """Write one response (JSON header line + raw body, compressed); returns the path"""
+    header = {
+        'method': method.upper(),
+        'url': _redacted_url(url),
+        'status': status,
+        'headers': [(k, v) for k, v in headers.items() if k.lower() not in DROPPED_HEADERS],
+    }
+    path = fixture_path(method, url, body)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Temp file + rename, so a concurrent replay never reads half a fixture
+    with open(f"{path}.tmp", 'wb') as f:
+        f.write(compress_bytes(json.dumps(header).encode() + b'\n' + content))
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+def load_fixture(method: str, url: str, body: bytes = b'') -> tuple:
+    """(status, headers, content) recorded for a request; raises FixtureNotFound"""
+    # Fixtures may have been recorded on a machine with a different default codec
+    for codec in (CODEC_ZSTD, CODEC_ZLIB):
+        path = fixture_path(method, url, body, codec)
+        if os.path.exists(path):
+            break
+    else:
+        raise FixtureNotFound(f"No fixture for {method.upper()} {_redacted_url(url)} in {FIXTURES_DIR}")
+
+    with open(path, 'rb') as f:
+        header, _, content = decompress_bytes(f.read(), codec).partition(b'\n')
+    header = json.loads(header)
+    return header['status'], header['headers'], content
+
+
+class FixtureAdapter(HTTPAdapter):
+    """requests transport adapter that records or replays responses (mounted by scrapers.http_client)"""
+
+    def __init__(self, mode: str, **kwargs):
+        super().__init__(**kwargs)
+        self.mode = mode
+
+    def send(self, request, **kwargs):
+        body = request.body.encode() if isinstance(request.body, str) else (request.body or b'')
+
+        if self.mode == MODE_REPLAY:
+            status, headers, content = load_fixture(request.method, request.url, body)
+            response = Response()
+            response.status_code = status
+            response.headers = CaseInsensitiveDict(headers)
+            response.encoding = get_encoding_from_headers(response.headers)
+            response._content = content
+            response._content_consumed = True
+            response.url = request.url
+            response.request = request
+            response.connection = self
+            return response
+
+        response = super().send(request, **kwargs)
+        save_fixture(request.method, request.url, body, response.status_code, response.headers, response.content)
+        return response
+
+
+class FixtureTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records responses of the wrapped transport, or replays them"""
+
+    def __init__(self, mode: str, transport: httpx.AsyncBaseTransport):
+        self.mode = mode
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        url = str(request.url)
+
+        if self.mode == MODE_REPLAY:
+            status, headers, content = load_fixture(request.method, url, body)
+        else:
+            response = await self.transport.handle_async_request(request)
+            # Wrap in a Response bound to the request so the body is decoded (gzip etc.)
+            response = httpx.Response(
+                response.status_code, headers=response.headers, stream=response.stream, request=request
+            )
+            content = await response.aread()
+            await response.aclose()
+            status, headers = response.status_code, response.headers.multi_items()
+            save_fixture(request.method, url, body, status, dict(headers), content)
+
+        headers = [(k, v) for k, v in headers if k.lower() not in DROPPED_HEADERS]
+        return httpx.Response(status, headers=headers, content=content, request=request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def fixture_transport(limits: httpx.Limits):
+    """Transport for an httpx client: None (httpx default) in live mode"""
+    if HTTP_MODE == MODE_LIVE:
+        return None
+    return FixtureTransport(HTTP_MODE, httpx.AsyncHTTPTransport(limits=limits))
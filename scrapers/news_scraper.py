@@ -13,8 +13,10 @@ import os
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scrapers.base_scraper import BaseScraper
-from lib.database import SessionLocal, NewsArticle
+from scrapers.base_scraper import BaseScraper, NotModified
+from lib.database import SessionLocal, NewsArticle, bulk_upsert, refresh_article_tags, MERGE_KEEP
+from lib.article_bodies import store_article_bodies
+from sqlalchemy import case
 
 # Try to import newspaper3k for full article extraction
 try:
@@ -25,6 +27,11 @@ except ImportError:
     print("⚠️  newspaper3k not available - will use RSS summaries only")
 
 
+def _keep_user_rating(existing, incoming):
+    """Merge rule: replace importance only while it is still the default rating of 1"""
+    return case((existing == 1, incoming), else_=existing)
+
+
 class NewsScraperConfig:
     """Configuration for news sources"""
     SOURCES = [
@@ -76,18 +83,23 @@ class NewsScraperConfig:
 class NewsScraper(BaseScraper):
     """Scrape freight news from RSS feeds"""
 
+    STORE_TABLES = ('news_articles', 'article_bodies', 'compression_dictionaries', 'article_tags')
+
     def __init__(self):
         super().__init__('news_scraper')
         self.config = NewsScraperConfig()
 
     def fetch(self) -> List[feedparser.FeedParserDict]:
-        """Fetch all RSS feeds"""
+        """Fetch all RSS feeds (conditional GETs; raises NotModified if no feed changed)"""
         all_feeds = []
+        unchanged = 0
 
         for source in self.config.SOURCES:
             try:
                 self.logger.info(f"Fetching {source['name']}...")
-                feed = feedparser.parse(source['url'])
+                response = self.conditional_get(source['url'])
+                response.raise_for_status()
+                feed = feedparser.parse(response.content, response_headers=response.headers)
 
                 if feed.bozo:  # Feed parsing error
                     self.logger.warning(f"Feed parsing warning for {source['name']}: {feed.bozo_exception}")
@@ -100,9 +112,14 @@ class NewsScraper(BaseScraper):
                 all_feeds.extend(feed.entries)
                 self.logger.info(f"  → {len(feed.entries)} articles from {source['name']}")
 
+            except NotModified:
+                unchanged += 1
             except Exception as e:
                 self.logger.error(f"Error fetching {source['name']}: {e}")
 
+        if unchanged == len(self.config.SOURCES):
+            raise NotModified('all feeds')
+
         return all_feeds
 
     def parse(self, feed_entries: List) -> List[Dict]:
@@ -159,31 +176,28 @@ class NewsScraper(BaseScraper):
     def store(self, articles: List[Dict]) -> None:
         """Store articles in database"""
         db = SessionLocal()
-        stored_count = 0
-        updated_count = 0
 
         try:
-            for article_data in articles:
-                # Check if article already exists
-                existing = db.query(NewsArticle).filter_by(id=article_data['id']).first()
-
-                if existing:
-                    # Update existing article (but preserve user annotations)
-                    existing.summary = article_data['summary']
-                    existing.full_content = article_data['full_content']
-                    if not existing.tags:  # Only auto-tag if no tags yet
-                        existing.tags = article_data['tags']
-                    if existing.importance == 1:  # Only auto-rate if not rated by user
-                        existing.importance = article_data['importance']
-                    updated_count += 1
-                else:
-                    # Create new article
-                    new_article = NewsArticle(**article_data)
-                    db.add(new_article)
-                    stored_count += 1
+            # Full text is stored compressed in article_bodies, not on the article row
+            bodies = {article['id']: article.get('full_content') for article in articles}
+            rows = [{k: v for k, v in article.items() if k != 'full_content'} for article in articles]
+
+            # Refresh scraped content but preserve user annotations
+            stored_count = bulk_upsert(
+                db, NewsArticle, rows,
+                index_elements=['id'],
+                update_columns=['summary', 'tags', 'importance'],
+                merge_rules={
+                    'tags': MERGE_KEEP,  # Only auto-tag if no tags yet
+                    'importance': _keep_user_rating  # Only auto-rate if not rated by user
+                }
+            )
+            store_article_bodies(db, bodies)
+            # Index whichever tags won the merge (existing user tags or new auto-tags)
+            refresh_article_tags(db, [article['id'] for article in articles])
 
             db.commit()
-            self.logger.info(f"Stored {stored_count} new articles, updated {updated_count} existing")
+            self.logger.info(f"Stored/updated {stored_count} articles")
 
         except Exception as e:
             db.rollback()
@@ -243,8 +257,12 @@ class NewsScraper(BaseScraper):
     def _extract_full_article(self, url: str) -> str:
         """Extract full article content using newspaper3k"""
         try:
+            # Download through the scraper session (shared headers, record/replay)
+            response = self.get(url)
+            response.raise_for_status()
+
             article = Article(url)
-            article.download()
+            article.download(input_html=response.text)
             article.parse()
             return article.text
         except Exception as e:
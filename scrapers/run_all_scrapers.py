@@ -1,10 +1,23 @@
 """
 Run All Scrapers
-Convenience script to run all data scrapers in sequence
+Convenience script to run all data scrapers in parallel
+Fetch and parse run concurrently; store phases that write the same tables are
+serialized (see scrapers.base_scraper.acquire_store_locks).
+
+Usage:
+    python scrapers/run_all_scrapers.py                  # write straight into the live database
+    python scrapers/run_all_scrapers.py --staging        # build into a staging copy, validate, then publish
+    python scrapers/run_all_scrapers.py --workers 1      # one scraper at a time
+    python scrapers/run_all_scrapers.py --full-backfill  # re-request full histories and unchanged pages
+    python scrapers/run_all_scrapers.py --record         # also save every HTTP response as a fixture
+    python scrapers/run_all_scrapers.py --replay         # serve HTTP from the fixtures (offline)
 """
 
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import os
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -15,15 +28,138 @@ from scrapers.fred_scraper import FREDScraper
 from scrapers.eia_diesel_scraper import EIADieselScraper
 from scrapers.bts_scraper import BTSScraper
 from scrapers.usaspending_scraper import USASpendingScraper
+from scrapers.http_client import request_stats
+from scrapers.http_fixtures import MODE_RECORD, MODE_REPLAY, FIXTURES_DIR, set_http_mode
+from lib.archive import archive_cold_data
+from lib.database import IS_POSTGRES, init_database
+from lib.snapshots import export_snapshots, feeds_snapshots
+from lib.staging import create_staging, use_staging, use_live, validate_staging, publish_staging, discard_staging
+
+
+def publish(staging_path, scrapers, results):
+    """
+    Validate the staging database and merge the scrapers' tables into the live one;
+    returns True if the live data was updated
+    """
+    use_live()
+
+    # Only tables of scrapers that stored data successfully are merged
+    stored = [scraper for name, scraper in scrapers if results[name] == "✅ Success"]
+    if not stored:
+        print("\nNo scraper stored new data - discarding staging database")
+        discard_staging(staging_path)
+        return False
+
+    store_tables = [scraper.STORE_TABLES for scraper in stored]
+    problems = validate_staging(staging_path, store_tables)
+    if problems:
+        print(f"\n❌ Staging validation failed - live database left untouched ({staging_path} kept for inspection):")
+        for problem in problems:
+            print(f"   - {problem}")
+        return False
+
+    print("\nPublishing staging database...")
+    tables = {table for group in store_tables for table in group}
+    try:
+        published = publish_staging(staging_path, tables, [scraper.scraper_name for scraper in stored])
+    except Exception as e:
+        print(f"\n❌ Staging publish failed - live database left untouched ({staging_path} kept for inspection):")
+        print(f"   - {e}")
+        return False
+    for table_name, count in published.items():
+        print(f"  {table_name}: {count:,} rows published")
+    discard_staging(staging_path)
+    return True
+
+
+def run_scraper(name, scraper):
+    """Run one scraper; returns its result label"""
+    print(f"▶ Starting: {name}")
+    try:
+        success = scraper.run()
+        if success and scraper.last_status == 'unchanged':
+            return "✅ Unchanged"  # 304 - nothing new to store
+        return "✅ Success" if success else "❌ Failed"
+    except Exception as e:
+        print(f"❌ Fatal error in {name}: {e}")
+        return f"❌ Error: {e}"
+
+
+def run_scrapers(scrapers, workers):
+    """Run scrapers on a thread pool; returns {name: result} in the given order"""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scraper') as pool:
+        futures = {name: pool.submit(run_scraper, name, scraper) for name, scraper in scrapers}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def print_timings(scrapers, elapsed):
+    """
+    Per-scraper phase durations (seconds), requests, MB downloaded and rows
+    inserted/updated/unchanged, next to the wall-clock time of the whole ingest
+    """
+    print(f"\n{'Scraper':<28}{'fetch':>8}{'parse':>8}{'wait':>8}{'store':>8}{'total':>8}"
+          f"{'reqs':>7}{'MB':>7}{'new':>8}{'upd':>8}{'same':>8}")
+    for name, scraper in scrapers:
+        t = scraper.timings
+        if not t:
+            continue
+        stats = scraper.phase_stats.values()
+        total = {key: sum(s[key] for s in stats) for key in ('requests', 'bytes_downloaded')}
+        # Rows are only classified with SCRAPER_COUNT_ROWS=1
+        rows = {key: '-' if None in (s[key] for s in stats) else sum(s[key] for s in stats)
+                for key in ('rows_inserted', 'rows_updated', 'rows_unchanged')}
+        print(f"{name[:27]:<28}{t['fetch']:>8.1f}{t['parse']:>8.1f}{t['store_wait']:>8.1f}"
+              f"{t['store']:>8.1f}{t.get('total', 0):>8.1f}{total['requests']:>7}"
+              f"{total['bytes_downloaded'] / 1e6:>7.1f}{rows['rows_inserted']:>8}"
+              f"{rows['rows_updated']:>8}{rows['rows_unchanged']:>8}")
+    print(f"{'Wall clock':<28}{elapsed:>40.1f}")
+
+
+def print_request_stats():
+    """Requests per host: count, failures, MB received, seconds spent rate limited and in flight"""
+    stats = request_stats()
+    if not stats:
+        return
+    print(f"\n{'Host':<28}{'reqs':>8}{'failed':>8}{'MB':>8}{'wait':>8}{'http':>8}")
+    for host, s in sorted(stats.items()):
+        print(f"{host[:27]:<28}{s['requests']:>8}{s['errors']:>8}{s['bytes'] / 1e6:>8.1f}"
+              f"{s['throttled']:>8.1f}{s['seconds']:>8.1f}")
 
 
 def main():
     """Run all scrapers"""
+    parser = argparse.ArgumentParser(description="Run all data scrapers")
+    parser.add_argument("--staging", action="store_true",
+                        help="Build into a staging copy and publish it atomically when valid")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Scrapers running at once (default: all)")
+    parser.add_argument("--full-backfill", action="store_true",
+                        help="Ignore high watermarks and cached validators; request full histories")
+    http_mode = parser.add_mutually_exclusive_group()
+    http_mode.add_argument("--record", dest="http_mode", action="store_const", const=MODE_RECORD,
+                           help="Save every HTTP response (compressed) to the fixtures directory")
+    http_mode.add_argument("--replay", dest="http_mode", action="store_const", const=MODE_REPLAY,
+                           help="Serve HTTP responses from the fixtures directory instead of the network")
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR,
+                        help=f"Fixtures directory for --record/--replay (default: {FIXTURES_DIR})")
+    args = parser.parse_args()
+    if args.staging and IS_POSTGRES:
+        parser.error("--staging needs the SQLite backend (unset DATABASE_URL)")
+    if args.http_mode:
+        set_http_mode(args.http_mode, args.fixtures_dir)
+
     print("=" * 60)
     print("FREIGHT INTELLIGENCE PORTAL - DATA INGESTION")
     print("=" * 60)
     print()
 
+    staging_path = None
+    if args.staging:
+        init_database()
+        staging_path = create_staging()
+        use_staging(staging_path)
+        print(f"Staging ingest into {staging_path}")
+
     scrapers = [
         ("News (4 sources)", NewsScraper()),
         ("EIA Diesel Prices", EIADieselScraper()),
@@ -34,19 +170,36 @@ def main():
         ("USASpending Gov Contracts", USASpendingScraper()),
     ]
 
-    results = {}
+    for _, scraper in scrapers:
+        scraper.full_backfill = args.full_backfill
 
-    for name, scraper in scrapers:
-        print(f"\n{'='*60}")
-        print(f"Running: {name}")
-        print(f"{'='*60}\n")
+    started = time.perf_counter()
+    results = run_scrapers(scrapers, args.workers or len(scrapers))
+    elapsed = time.perf_counter() - started
+
+    published = True
+    if staging_path:
+        published = publish(staging_path, scrapers, results)
+        if not published:
+            results["Staging publish"] = "❌ Not published"
+
+    # Move cold news/rates to the Parquet archive before the hot tables are snapshotted
+    if published:
+        print("\nArchiving cold data...")
+        try:
+            for table_name, count in archive_cold_data().items():
+                print(f"  {table_name}: {count:,} rows archived")
+        except Exception as e:
+            print(f"⚠️  Archive failed (rows stay in SQLite): {e}")
 
+    # Refresh columnar snapshots read by the dashboards if a scraper stored into a snapshot table
+    if published and any(results[name] == "✅ Success" and feeds_snapshots(scraper.STORE_TABLES)
+                         for name, scraper in scrapers):
+        print("\nExporting columnar snapshots...")
         try:
-            success = scraper.run()
-            results[name] = "✅ Success" if success else "❌ Failed"
+            export_snapshots()
         except Exception as e:
-            print(f"❌ Fatal error in {name}: {e}")
-            results[name] = f"❌ Error: {e}"
+            print(f"⚠️  Snapshot export failed (pages will read SQLite): {e}")
 
     # Summary
     print(f"\n\n{'='*60}")
@@ -56,6 +209,8 @@ def main():
     for name, result in results.items():
         print(f"{name:.<40} {result}")
 
+    print_timings(scrapers, elapsed)
+    print_request_stats()
     print()
 
     # Check if any failed
@@ -0,0 +1,194 @@
+"""
+Ingest Scheduler
+Long-running daemon that runs each scraper on its source's release cadence
+instead of refreshing everything at once (see run_all_scrapers for a one-off ingest).
+
+Every job runs at most one instance at a time; runs missed while the daemon was
+busy are coalesced into one if still within SCHEDULER_MISFIRE_GRACE seconds.
+On startup, sources whose last completed run (scraper_runs) is older than their
+schedule allows run right away, so a restart never skips a release.
+
+Usage:
+    python scrapers/scheduler.py          # run until interrupted (Ctrl+C / SIGTERM)
+    python scrapers/scheduler.py --list   # show the schedule and exit
+"""
+
+import argparse
+from datetime import datetime, timezone
+import logging
+import signal
+import sys
+import os
+import threading
+from zoneinfo import ZoneInfo
+
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.base_scraper import acquire_store_locks
+from scrapers.news_scraper import NewsScraper
+from scrapers.cass_scraper import CassScraper
+from scrapers.ata_scraper import ATAScraper
+from scrapers.fred_scraper import FREDScraper
+from scrapers.eia_diesel_scraper import EIADieselScraper
+from scrapers.usaspending_scraper import USASpendingScraper
+from scrapers.run_all_scrapers import run_scraper
+from lib.archive import archive_cold_data
+from lib.database import SessionLocal, init_database, last_completed_runs
+from lib.snapshots import export_snapshots, feeds_snapshots
+
+# Release times below are US Eastern (EIA, FRED, Cass and ATA publish on ET)
+SCHEDULER_TIMEZONE = ZoneInfo(os.getenv("SCHEDULER_TIMEZONE", "America/New_York"))
+
+# Scrapers running at once, and how late (seconds) a missed run may still start
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "4"))
+SCHEDULER_MISFIRE_GRACE = int(os.getenv("SCHEDULER_MISFIRE_GRACE", "3600"))
+
+logger = logging.getLogger('scheduler')
+
+
+def _cron(**fields):
+    return CronTrigger(timezone=SCHEDULER_TIMEZONE, **fields)
+
+
+# scraper_name -> (label, scraper class, trigger); jitter spreads requests away from the
+# round minute every other client picks
+SCHEDULES = {
+    'news_scraper': ("News (4 sources)", NewsScraper,
+                     IntervalTrigger(minutes=15, jitter=60, timezone=SCHEDULER_TIMEZONE)),
+    # Weekly diesel prices come out Monday ~5pm ET (Tuesday after a federal holiday);
+    # the Tuesday run is incremental and cheap when Monday already got the week
+    'eia_diesel_scraper': ("EIA Diesel Prices", EIADieselScraper,
+                           _cron(day_of_week='mon,tue', hour=18, minute=0, jitter=900)),
+    'fred_scraper': ("FRED Economic Indicators", FREDScraper,
+                     _cron(hour=17, minute=30, jitter=900)),
+    # Cass publishes mid-month, ATA tonnage in the third/fourth week
+    'cass_scraper': ("Cass Freight Index", CassScraper,
+                     _cron(day=16, hour=10, minute=0, jitter=1800)),
+    'ata_scraper': ("ATA Truck Tonnage", ATAScraper,
+                    _cron(day=25, hour=10, minute=0, jitter=1800)),
+    'usaspending_scraper': ("USASpending Gov Contracts", USASpendingScraper,
+                            _cron(day_of_week='mon', hour=9, minute=0, jitter=1800)),
+}
+
+# Nightly maintenance: move cold rows to the Parquet archive
+ARCHIVE_TRIGGER = _cron(hour=3, minute=15)
+
+# Snapshot exports read every table; one at a time is enough
+_snapshot_lock = threading.Lock()
+
+
+def run_source(scraper_name: str) -> None:
+    """Job: run one scraper (a fresh instance per run), then refresh snapshots if it stored snapshot data"""
+    label, scraper_class, _ = SCHEDULES[scraper_name]
+    scraper = scraper_class()
+    result = run_scraper(label, scraper)
+    t = scraper.timings
+    logger.info(f"{label}: {result} (fetch {t['fetch']:.1f}s, parse {t['parse']:.1f}s, "
+                f"store {t['store']:.1f}s, total {t.get('total', 0):.1f}s)")
+
+    # News stores no snapshot table: re-exporting after its runs would rewrite unchanged files
+    if scraper.last_status == 'success' and feeds_snapshots(scraper.STORE_TABLES):
+        with _snapshot_lock:
+            try:
+                export_snapshots()
+            except Exception as e:
+                logger.warning(f"Snapshot export failed (pages will read the database): {e}")
+
+
+def run_archive() -> None:
+    """Job: archive cold news/rates (holding their store locks, so no scraper writes meanwhile)"""
+    with acquire_store_locks(['news_articles', 'article_bodies', 'article_tags', 'rates']):
+        for table_name, count in archive_cold_data().items():
+            logger.info(f"Archived {count:,} {table_name} rows")
+
+
+def overdue_sources(now: datetime) -> set:
+    """Scrapers whose schedule fired since their last completed run (or that never completed one)"""
+    db = SessionLocal()
+    try:
+        last_runs = last_completed_runs(db)
+    finally:
+        db.close()
+
+    overdue = set()
+    for scraper_name, (_, _, trigger) in SCHEDULES.items():
+        last_run = last_runs.get(scraper_name)
+        if last_run is None:
+            overdue.add(scraper_name)
+            continue
+        last_run = last_run.replace(tzinfo=timezone.utc)  # scraper_runs stores naive UTC
+        due = trigger.get_next_fire_time(last_run, last_run)
+        if due is not None and due <= now:
+            overdue.add(scraper_name)
+    return overdue
+
+
+def build_scheduler() -> BlockingScheduler:
+    """Scheduler with one job per source plus the nightly archive"""
+    scheduler = BlockingScheduler(
+        executors={'default': ThreadPoolExecutor(SCHEDULER_WORKERS)},
+        job_defaults={
+            'max_instances': 1,  # A slow run is never overlapped by the next one
+            'coalesce': True,  # Several missed runs collapse into one
+            'misfire_grace_time': SCHEDULER_MISFIRE_GRACE,
+        },
+        timezone=SCHEDULER_TIMEZONE
+    )
+
+    now = datetime.now(SCHEDULER_TIMEZONE)
+    overdue = overdue_sources(now)
+    for scraper_name, (label, _, trigger) in SCHEDULES.items():
+        # A job added with next_run_time runs then and follows its trigger afterwards
+        first_run = {'next_run_time': now} if scraper_name in overdue else {}
+        scheduler.add_job(run_source, trigger, args=[scraper_name], id=scraper_name, name=label, **first_run)
+
+    scheduler.add_job(run_archive, ARCHIVE_TRIGGER, id='archive', name="Archive cold data")
+    return scheduler
+
+
+def print_schedule() -> None:
+    """Next run of every source (overdue ones run as soon as the daemon starts)"""
+    now = datetime.now(SCHEDULER_TIMEZONE)
+    overdue = overdue_sources(now)
+    for scraper_name, (label, _, trigger) in SCHEDULES.items():
+        next_run = "at startup (overdue)" if scraper_name in overdue else \
+            f"{trigger.get_next_fire_time(None, now):%a %Y-%m-%d %H:%M %Z}"
+        print(f"{label:.<40} {next_run}  [{trigger}]")
+    print(f"{'Archive cold data':.<40} {ARCHIVE_TRIGGER.get_next_fire_time(None, now):%a %Y-%m-%d %H:%M %Z}")
+
+
+def main():
+    """Run the ingest scheduler"""
+    parser = argparse.ArgumentParser(description="Run scrapers on their source release schedules")
+    parser.add_argument("--list", action="store_true", help="Print the schedule and exit")
+    args = parser.parse_args()
+
+    init_database()
+
+    if args.list:
+        print_schedule()
+        return
+
+    scheduler = build_scheduler()
+
+    # Stop cleanly under systemd/Docker too: running scrapers finish, nothing new starts
+    signal.signal(signal.SIGTERM, lambda *_: scheduler.shutdown())
+
+    logger.info(f"Scheduler started ({SCHEDULER_TIMEZONE}); {len(SCHEDULES)} sources, Ctrl+C to stop")
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    logger.info("Scheduler stopped")
+
+
+if __name__ == "__main__":
+    main()
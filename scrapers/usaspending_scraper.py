@@ -5,20 +5,23 @@ Source: https://www.usaspending.gov/
 API Docs: https://api.usaspending.gov/
 """
 
-import requests
+import asyncio
 from datetime import datetime, timedelta
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scrapers.base_scraper import BaseScraper
-from lib.database import SessionLocal, Rate, Lane
+from scrapers.base_scraper import AsyncBaseScraper
+from lib.database import SessionLocal, Rate, Lane, bulk_upsert, load_key_map
+from lib.dates import to_epoch_day
 
 
-class USASpendingScraper(BaseScraper):
+class USASpendingScraper(AsyncBaseScraper):
     """Scrape government freight contract data from USASpending.gov"""
 
+    STORE_TABLES = ('lanes', 'rates')
+
     API_BASE = "https://api.usaspending.gov/api/v2/search/spending_by_award/"
 
     # PSC (Product Service Codes) for freight transportation
@@ -26,84 +29,90 @@ class USASpendingScraper(BaseScraper):
     # V2 = Freight forwarding
     FREIGHT_PSC_CODES = ['V1', 'V2']
 
+    LIMIT_PER_PAGE = 100
+    MAX_CONTRACTS_PER_PSC = 2000  # Collect up to 2000 contracts per PSC code
+
     def __init__(self):
         super().__init__('usaspending_scraper')
 
-    def fetch(self):
-        """Fetch recent freight contract awards with pagination"""
+    async def fetch(self):
+        """Fetch recent freight contract awards, one paginated walk per PSC code (run concurrently)"""
         self.logger.info("Fetching government freight contracts from USASpending.gov...")
 
         # Get contracts from last 24 months for more data
         end_date = datetime.now()
         start_date = end_date - timedelta(days=730)  # 2 years
 
-        all_awards = []
-        limit_per_page = 100
-        max_contracts_per_psc = 2000  # Collect up to 2000 contracts per PSC code
+        results = await asyncio.gather(*(
+            self._fetch_psc(psc_code, start_date, end_date) for psc_code in self.FREIGHT_PSC_CODES
+        ))
+        all_awards = [award for awards in results for award in awards]
 
-        for psc_code in self.FREIGHT_PSC_CODES:
-            try:
-                self.logger.info(f"Fetching PSC code {psc_code} (Trucking/Freight)...")
-                page = 1
-                psc_total = 0
-
-                while psc_total < max_contracts_per_psc:
-                    payload = {
-                        "filters": {
-                            "time_period": [
-                                {
-                                    "start_date": start_date.strftime("%Y-%m-%d"),
-                                    "end_date": end_date.strftime("%Y-%m-%d")
-                                }
-                            ],
-                            "award_type_codes": ["A", "B", "C", "D"],  # Contracts
-                            "psc_codes": [psc_code]
-                        },
-                        "fields": [
-                            "Award ID",
-                            "Recipient Name",
-                            "Start Date",
-                            "End Date",
-                            "Award Amount",
-                            "Description",
-                            "awarding_agency_name",
-                            "recipient_location_state_code",
-                            "pop_state_code"  # Place of performance
+        self.logger.info(f"Total contracts fetched across all PSC codes: {len(all_awards)}")
+        return all_awards
+
+    async def _fetch_psc(self, psc_code, start_date, end_date):
+        """Page through the awards of one PSC code"""
+        awards_for_psc = []
+
+        try:
+            self.logger.info(f"Fetching PSC code {psc_code} (Trucking/Freight)...")
+            page = 1
+
+            while len(awards_for_psc) < self.MAX_CONTRACTS_PER_PSC:
+                payload = {
+                    "filters": {
+                        "time_period": [
+                            {
+                                "start_date": start_date.strftime("%Y-%m-%d"),
+                                "end_date": end_date.strftime("%Y-%m-%d")
+                            }
                         ],
-                        "page": page,
-                        "limit": limit_per_page,
-                        "sort": "Award Amount",
-                        "order": "desc"
-                    }
-
-                    response = self.post(self.API_BASE, json=payload)
-                    response.raise_for_status()
-
-                    data = response.json()
-
-                    if 'results' in data and len(data['results']) > 0:
-                        awards = data['results']
-                        all_awards.extend(awards)
-                        psc_total += len(awards)
-                        self.logger.info(f"  → Page {page}: {len(awards)} contracts (total: {psc_total})")
-
-                        # If we got fewer results than the limit, we've reached the end
-                        if len(awards) < limit_per_page:
-                            break
-
-                        page += 1
-                    else:
-                        self.logger.info(f"  → No more results for {psc_code}")
+                        "award_type_codes": ["A", "B", "C", "D"],  # Contracts
+                        "psc_codes": [psc_code]
+                    },
+                    "fields": [
+                        "Award ID",
+                        "Recipient Name",
+                        "Start Date",
+                        "End Date",
+                        "Award Amount",
+                        "Description",
+                        "awarding_agency_name",
+                        "recipient_location_state_code",
+                        "pop_state_code"  # Place of performance
+                    ],
+                    "page": page,
+                    "limit": self.LIMIT_PER_PAGE,
+                    "sort": "Award Amount",
+                    "order": "desc"
+                }
+
+                response = await self.apost(self.API_BASE, json=payload)
+                response.raise_for_status()
+
+                data = response.json()
+
+                if 'results' in data and len(data['results']) > 0:
+                    awards = data['results']
+                    awards_for_psc.extend(awards)
+                    self.logger.info(f"  → {psc_code} page {page}: {len(awards)} contracts (total: {len(awards_for_psc)})")
+
+                    # If we got fewer results than the limit, we've reached the end
+                    if len(awards) < self.LIMIT_PER_PAGE:
                         break
 
-                self.logger.info(f"  ✓ Collected {psc_total} total contracts for {psc_code}")
+                    page += 1
+                else:
+                    self.logger.info(f"  → No more results for {psc_code}")
+                    break
 
-            except Exception as e:
-                self.logger.error(f"Error fetching PSC {psc_code}: {e}")
-                continue
+            self.logger.info(f"  ✓ Collected {len(awards_for_psc)} total contracts for {psc_code}")
 
-        self.logger.info(f"Total contracts fetched across all PSC codes: {len(all_awards)}")
-        return all_awards
+        except Exception as e:
+            self.logger.error(f"Error fetching PSC {psc_code}: {e}")
+
+        return awards_for_psc
 
     def parse(self, raw_data):
         """Parse contract awards into rate data"""
@@ -160,60 +169,47 @@ class USASpendingScraper(BaseScraper):
     def store(self, contracts):
         """Store contract data in database"""
         db = SessionLocal()
-        stored_count = 0
-        lanes_created = 0
+        lane_key = ['origin', 'destination', 'equipment_type']
 
         try:
+            # Create any missing lanes in one batch
+            lane_rows = [{
+                'origin': contract['origin'],
+                'destination': contract['destination'],
+                'equipment_type': contract['equipment_type'],
+                'distance_miles': 500  # Placeholder - would need geocoding
+            } for contract in contracts]
+
+            lanes_created = bulk_upsert(db, Lane, lane_rows, index_elements=lane_key, update_columns=[])
+            lane_ids = load_key_map(db, Lane, lane_key)
+
+            rate_rows = []
             for contract in contracts:
-                # Get or create lane
-                lane = db.query(Lane).filter_by(
-                    origin=contract['origin'],
-                    destination=contract['destination'],
-                    equipment_type=contract['equipment_type']
-                ).first()
-
-                if not lane:
-                    # Create new lane
-                    lane = Lane(
-                        origin=contract['origin'],
-                        destination=contract['destination'],
-                        equipment_type=contract['equipment_type'],
-                        distance_miles=500  # Placeholder - would need geocoding
-                    )
-                    db.add(lane)
-                    db.flush()  # Get lane ID
-                    lanes_created += 1
-
                 # Parse date
                 try:
                     date_str = contract['start_date']
-                    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                    date = date_obj.strftime('%Y-%m-%d')
+                    date = to_epoch_day(date_str[:10])
                 except:
-                    date = datetime.now().strftime('%Y-%m-%d')
-
-                # Check if rate already exists
-                existing = db.query(Rate).filter_by(
-                    lane_id=lane.id,
-                    date=date,
-                    source='USASpending'
-                ).first()
-
-                if not existing:
-                    # Create new rate record
-                    # Note: We're storing the contract amount, not rate per mile
-                    # In a real system, we'd calculate actual rate per mile
-                    new_rate = Rate(
-                        lane_id=lane.id,
-                        date=date,
-                        rate_per_mile=0.0,  # Would need actual mileage to calculate
-                        is_spot=False,
-                        is_contract=True,
-                        source='USASpending',
-                        confidence_score=0.8  # Medium confidence due to limited data
-                    )
-                    db.add(new_rate)
-                    stored_count += 1
+                    date = to_epoch_day(datetime.now())
+
+                # Note: We're storing the contract amount, not rate per mile
+                # In a real system, we'd calculate actual rate per mile
+                rate_rows.append({
+                    'lane_id': lane_ids[tuple(contract[col] for col in lane_key)],
+                    'date': date,
+                    'rate_per_mile': 0.0,  # Would need actual mileage to calculate
+                    'is_spot': False,
+                    'is_contract': True,
+                    'source': 'USASpending',
+                    'confidence_score': 0.8  # Medium confidence due to limited data
+                })
+
+            # Existing (lane, date, source) rates are left untouched
+            stored_count = bulk_upsert(
+                db, Rate, rate_rows,
+                index_elements=['lane_id', 'date', 'source'],
+                update_columns=[]
+            )
 
             db.commit()
             self.logger.info(f"Stored {stored_count} contract rates, created {lanes_created} new lanes")
@@ -0,0 +1,30 @@
+"""
+Test setup: the SQLite database (and its staging copy) live in a temporary
+directory, configured before lib.database reads the environment
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+TEST_DIR = tempfile.mkdtemp(prefix="freight-tests-")
+os.environ["DATABASE_PATH"] = os.path.join(TEST_DIR, "freight.db")
+os.environ["DATABASE_URL"] = ""
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib import database  # noqa: E402
+from lib.staging import discard_staging, use_live  # noqa: E402
+
+
+@pytest.fixture
+def live_db():
+    """An empty live database; sessions are routed back to it afterwards"""
+    database.engine.dispose()
+    discard_staging(database.DB_PATH)
+    database.init_database()
+    yield database.DB_PATH
+    use_live()
+    database.engine.dispose()
@@ -0,0 +1,94 @@
+"""Publishing a staging database while the live one receives writes"""
+
+from datetime import datetime
+
+from lib.database import DieselPrice, Lane, Rate, ScraperRun, SessionLocal
+from lib.staging import create_staging, discard_staging, publish_staging, use_live, use_staging, validate_staging
+
+STORE_TABLES = [('lanes', 'rates'), ('diesel_prices',)]
+
+
+def _add(*rows):
+    db = SessionLocal()
+    try:
+        for row in rows:
+            db.add(row)
+            db.flush()  # Keep insertion order, so surrogate ids follow it
+        db.commit()
+    finally:
+        db.close()
+
+
+def _lane_rate(origin, destination, rate):
+    db = SessionLocal()
+    try:
+        lane = Lane(origin=origin, destination=destination, equipment_type='van')
+        db.add(lane)
+        db.flush()
+        db.add(Rate(lane_id=lane.id, date='2024-01-01', rate_per_mile=rate, source='test'))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _query(sql):
+    from sqlalchemy import text
+    db = SessionLocal()
+    try:
+        return db.execute(text(sql)).all()
+    finally:
+        db.close()
+
+
+def test_publish_keeps_conflicting_live_writes(live_db):
+    _lane_rate('Chicago', 'Dallas', 2.0)
+    path = create_staging(f"{live_db}.staging")
+
+    # The ingest (staging) and the scheduler (live) write in parallel, so their new rows get the same ids
+    use_staging(path)
+    _lane_rate('Seattle', 'Portland', 3.0)
+    _add(DieselPrice(date='2024-01-01', region_code='NUS', price=4.0),
+         DieselPrice(date='2024-01-01', region_code='R10', price=4.1),
+         ScraperRun(scraper_name='usaspending_scraper', started_at=datetime(2024, 1, 1, 1), status='success',
+                    checkpoint='page-2'))
+    use_live()
+    _lane_rate('New York', 'Miami', 4.0)
+    _add(DieselPrice(date='2024-01-01', region_code='R10', price=4.1),
+         DieselPrice(date='2024-01-01', region_code='NUS', price=4.0),
+         ScraperRun(scraper_name='news_scraper', started_at=datetime(2024, 1, 1, 2), status='success'))
+
+    assert validate_staging(path, STORE_TABLES) == []
+    published = publish_staging(path, {'lanes', 'rates', 'diesel_prices'}, ['eia_diesel_scraper'])
+    discard_staging(path)
+
+    # Live ids stand; the staging lane gets a new id and its rate follows it
+    assert _query("SELECT l.id, l.origin, r.rate_per_mile FROM lanes l JOIN rates r ON r.lane_id = l.id "
+                  "ORDER BY l.id") == [(1, 'Chicago', 2.0), (2, 'New York', 4.0), (3, 'Seattle', 3.0)]
+    assert published['lanes'] == 1 and published['rates'] == 1
+
+    # Same natural keys inserted in a different order merge instead of colliding
+    assert _query("SELECT region_code, price FROM diesel_prices ORDER BY region_code") == [('NUS', 4.0), ('R10', 4.1)]
+
+    # The staging run follows the live one, without a checkpoint for rows that were not its own
+    assert _query("SELECT id, scraper_name, checkpoint FROM scraper_runs ORDER BY id") == [
+        (1, 'news_scraper', None), (2, 'usaspending_scraper', None)
+    ]
+
+
+def test_validation_rejects_truncated_and_inconsistent_loads(live_db):
+    _lane_rate('Chicago', 'Dallas', 2.0)
+    _lane_rate('Atlanta', 'Denver', 2.5)
+    path = create_staging(f"{live_db}.staging")
+
+    use_staging(path)
+    db = SessionLocal()
+    db.query(Lane).filter_by(origin='Chicago').delete()
+    db.commit()
+    db.close()
+    use_live()
+
+    problems = validate_staging(path, STORE_TABLES)
+    discard_staging(path)
+    assert "lanes: 1 rows in staging < 2 when copied" in problems
+    assert "rates: 1 rows reference a missing lanes row" in problems
+    assert "diesel_prices: empty in staging" in problems